@@ -0,0 +1,176 @@
+"""Soaks the image displayer with thousands of image changes and resizes,
+the way a long session would, and checks that it doesn't pile anything
+up: the canvas keeps a single image item, the cache of PhotoImages stays
+within its limit, and the memory the app uses stays flat once every
+image and size has been seen.
+
+It needs a display, since it opens the app's window.
+
+Usage (from the root of the repository):
+    python benchmarks/canvas_soak.py [--changes N] [--images N]
+"""
+
+from pathlib import Path
+from random import Random
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+REPOSITORY = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPOSITORY))
+
+from PIL import Image
+
+from core import resident_megabytes
+
+# the sizes the window goes through while it's "resized"
+WINDOW_SIZES = [(640, 480), (800, 600), (1024, 700), (700, 900), (500, 400)]
+
+# the preferences the app is started with, everything else is default.
+# The image cache is kept small so that it fills up early in the soak.
+PREFERENCES = {
+    "image_cache_megabytes": 64,
+    "record_history": False,
+    "load_saved_directories": False,
+}
+
+
+def make_images(folder: str, image_amount: int, seed: int) -> None:
+    """Writes image_amount made up images of different sizes and modes."""
+    random = Random(seed)
+    for index in range(image_amount):
+        size = (random.randint(600, 2400), random.randint(600, 2400))
+        image = Image.effect_noise(size, 64).convert("RGB")
+        if index % 5 == 0:
+            image = image.convert("P", palette=Image.Palette.ADAPTIVE)
+        suffix = ".jpg" if index % 2 and image.mode == "RGB" else ".png"
+        image.save(os.path.join(folder, f"image_{index:04}{suffix}"))
+
+
+def soak(folder: str, changes: int, resize_every: int, samples: int) -> list[dict]:
+    """Changes the image changes times, resizing the window every
+    resize_every changes, and returns samples measurements spread over
+    the soak.
+    """
+    import main
+
+    window = main.App(
+        windows_icon=main.resource_path("other_essentials/app_icon.ico"),
+        linux_icon=main.resource_path("other_essentials/app_icon.png"),
+        mac_icon=main.resource_path("other_essentials/app_icon.icns"),
+        geometry=(WINDOW_SIZES[0][0], WINDOW_SIZES[0][1] + 200),
+    )
+    image_frame = window.image_frame
+    try:
+        window.update()
+        window.button_frame.loop_or_not.set(True)
+        window.open_folders([folder])
+        while window.folder_scanners or image_frame.image_key is None:
+            window.update()
+
+        measurements = []
+        sample_every = max(1, changes // samples)
+        for change in range(1, changes + 1):
+            window.button_frame.change_image(next_or_previous=True)
+            if change % resize_every == 0:
+                width, height = WINDOW_SIZES[
+                    (change // resize_every) % len(WINDOW_SIZES)
+                ]
+                image_frame.show_full_image(width, height, preview=True)
+                image_frame.show_full_image(width, height)
+            window.update()
+
+            if change % sample_every == 0:
+                measurements.append(
+                    {
+                        "changes": change,
+                        "canvas_items": len(image_frame.image_displayer.find_all()),
+                        "photo_images": len(image_frame.photo_images),
+                        "photo_image_limit": image_frame.photo_image_limit,
+                        "resident_megabytes": resident_megabytes(),
+                    }
+                )
+        return measurements
+    finally:
+        window.destroy()
+        window.save_load_system.flush()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--changes", type=int, default=5_000)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--resize-every", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=16,
+        help="the megabytes the memory may grow by after the first quarter",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import tkinter
+
+    try:
+        tkinter.Tk().destroy()
+    except tkinter.TclError as e:
+        print(f"Skipped, there's no display: {e}")
+        return 0
+
+    # the app looks its images up in sys._MEIPASS when it's set, and
+    # keeps its preferences in the current folder
+    sys._MEIPASS = str(REPOSITORY)
+    working_folder = tempfile.mkdtemp()
+    previous_folder = os.getcwd()
+    os.chdir(working_folder)
+    try:
+        with open("preferences.txt", "w") as f:
+            f.write(str(PREFERENCES))
+        os.mkdir("images")
+        make_images("images", args.images, args.seed)
+
+        measurements = soak(
+            os.path.abspath("images"), args.changes, args.resize_every, args.samples
+        )
+    finally:
+        os.chdir(previous_folder)
+        shutil.rmtree(working_folder, ignore_errors=True)
+
+    print(f"{'changes':>8}{'canvas items':>14}{'PhotoImages':>13}{'memory MB':>11}")
+    for measurement in measurements:
+        resident = measurement["resident_megabytes"]
+        print(
+            f"{measurement['changes']:>8}{measurement['canvas_items']:>14}"
+            f"{measurement['photo_images']:>13}"
+            f"{'-' if resident is None else f'{resident:.1f}':>11}"
+        )
+
+    failures = []
+    if any(measurement["canvas_items"] != 1 for measurement in measurements):
+        failures.append("the canvas holds more than one item")
+    if any(
+        measurement["photo_images"] > measurement["photo_image_limit"]
+        for measurement in measurements
+    ):
+        failures.append("the PhotoImage cache grew past its limit")
+
+    # the first quarter fills the caches, after that nothing should grow
+    settled = measurements[len(measurements) // 4 :]
+    resident = [measurement["resident_megabytes"] for measurement in settled]
+    if None not in resident and settled:
+        growth = resident[-1] - min(resident)
+        print(f"memory growth after the first quarter: {growth:.1f} MB")
+        if growth > args.max_growth:
+            failures.append(f"the memory grew by {growth:.1f} MB")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
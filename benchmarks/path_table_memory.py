@@ -0,0 +1,102 @@
+"""Compares the memory a PathTable takes against a list of Path objects
+for the same images.
+
+The target for a PathTable is at most TARGET_OVERHEAD bytes per image on
+top of the length of the image's file name, counting the directories and
+the room the arrays grow into.
+
+Usage (from the root of the repository):
+    python benchmarks/path_table_memory.py [folder] [--images N]
+
+Without a folder, N made up paths spread over folders of 250 images are
+used instead.
+"""
+
+from pathlib import Path
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import PathTable
+
+TARGET_OVERHEAD = 20
+
+
+def made_up_paths(image_amount: int) -> list[str]:
+    return [
+        os.path.join(
+            "home",
+            "user",
+            "Pictures",
+            "references",
+            f"set_{i // 250:05}",
+            f"IMG_{i:07}.jpg",
+        )
+        for i in range(image_amount)
+    ]
+
+
+def folder_paths(folder: str) -> list[str]:
+    return [
+        os.path.join(dir_path, file_name)
+        for dir_path, _, file_names in os.walk(folder)
+        for file_name in file_names
+        if file_name.lower().endswith((".png", ".jpg", ".jpeg"))
+    ]
+
+
+def path_list(paths: list[str]) -> list[Path]:
+    path_objects = [Path(os.path.dirname(p), os.path.basename(p)) for p in paths]
+    for path in path_objects:
+        str(path)
+    return path_objects
+
+
+def measure(build) -> tuple[object, int]:
+    """Returns what build returns along with the amount of bytes it
+    allocated and kept.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, allocated
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", nargs="?")
+    parser.add_argument("--images", type=int, default=500_000)
+    args = parser.parse_args()
+
+    paths = folder_paths(args.folder) if args.folder else made_up_paths(args.images)
+    if not paths:
+        print("No images were found.")
+        return 1
+    name_bytes = sum(len(os.fsencode(os.path.basename(path))) for path in paths)
+
+    # the list of Paths is built the way the scanner builds it, and every
+    # Path keeps its string once it's been opened
+    _, list_bytes = measure(lambda: path_list(paths))
+    _, table_bytes = measure(lambda: PathTable(paths))
+
+    image_amount = len(paths)
+    overhead = (table_bytes - name_bytes) / image_amount
+    print(f"images:              {image_amount}")
+    print(f"average name length: {name_bytes / image_amount:.1f} bytes")
+    print(f"list of Paths:       {list_bytes / image_amount:.1f} bytes per image")
+    print(f"PathTable:           {table_bytes / image_amount:.1f} bytes per image")
+    print(
+        f"PathTable overhead:  {overhead:.1f} bytes per image "
+        f"(target: {TARGET_OVERHEAD})"
+    )
+    return 0 if overhead <= TARGET_OVERHEAD else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Measures how long recording an image change in the SessionHistory
+takes on the thread that changes the image, against doing nothing and
+against inserting every record into SQLite right away.
+
+Usage (from the root of the repository):
+    python benchmarks/session_history_latency.py [--images N]
+"""
+
+from pathlib import Path
+from time import perf_counter, time
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import SessionHistory
+
+
+def latencies(record, image_amount: int) -> list[float]:
+    """Returns the microseconds every call to record took."""
+    timings = []
+    for index in range(image_amount):
+        path = f"/home/user/Pictures/references/IMG_{index:07}.jpg"
+        start = perf_counter()
+        record(path)
+        timings.append((perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def summary(name: str, timings: list[float]) -> str:
+    timings = sorted(timings)
+    return (
+        f"{name:<22}"
+        f"p50 {timings[len(timings) // 2]:8.2f} us   "
+        f"p99 {timings[int(len(timings) * 0.99)]:8.2f} us   "
+        f"max {timings[-1]:8.2f} us"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        # nothing recorded at all
+        nothing = latencies(lambda path: None, args.images)
+
+        # the SessionHistory, with its writer thread inserting in batches
+        history = SessionHistory(
+            file_name=os.path.join(folder, "history.sqlite3"), batch_interval=0.05
+        )
+        recorded = latencies(
+            lambda path: history.show(path=path, planned=30, completed=True),
+            args.images,
+        )
+        history.close()
+
+        connection = sqlite3.connect(os.path.join(folder, "history.sqlite3"))
+        written = connection.execute("SELECT COUNT(*) FROM views").fetchone()[0]
+
+        # every record inserted and committed on the same thread
+        def insert_right_away(path: str) -> None:
+            with connection:
+                connection.execute(
+                    "INSERT INTO views VALUES (?, ?, ?, ?, ?, ?)",
+                    (0, path, time(), 30, 30, 1),
+                )
+
+        inserted = latencies(insert_right_away, args.images)
+        connection.close()
+
+    print(f"images: {args.images} ({written} written by the history)")
+    print(summary("nothing recorded:", nothing))
+    print(summary("SessionHistory:", recorded))
+    print(summary("inserted right away:", inserted))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
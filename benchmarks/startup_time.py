@@ -0,0 +1,125 @@
+"""Measures how long the app takes to start, broken down into importing
+the modules it needs, decoding its images, showing the window for the
+first time (first paint), and the work that's done after that.
+
+The target is a first paint under TARGET_FIRST_PAINT milliseconds. Every
+run starts the app in a new process from an empty folder, so no saved
+preferences or folders are loaded. Needs a display.
+
+Usage (from the root of the repository):
+    python benchmarks/startup_time.py [--runs N]
+"""
+
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+TARGET_FIRST_PAINT = 300
+
+REPOSITORY = Path(__file__).resolve().parent.parent
+
+
+def measure_startup() -> dict[str, float]:
+    """Starts the app in this process and returns the milliseconds every
+    part of the startup took, counted from when this function started.
+    """
+    start = perf_counter()
+    timings = {}
+
+    import customtkinter
+    import PIL.Image
+    import PIL.ImageTk
+    import tktooltip
+
+    timings["imports"] = (perf_counter() - start) * 1000
+
+    # counts the time spent opening and decoding images
+    decoding = [0.0]
+    open_image = PIL.Image.open
+    load_image = PIL.Image.Image.load
+
+    def timed(function):
+        def wrapper(*args, **kwargs):
+            function_start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                decoding[0] += perf_counter() - function_start
+
+        return wrapper
+
+    PIL.Image.open = timed(open_image)
+    PIL.Image.Image.load = timed(load_image)
+
+    def mainloop(window, *args, **kwargs):
+        timings["app_created"] = (perf_counter() - start) * 1000
+        timings["asset_decode_before_paint"] = decoding[0] * 1000
+
+        window.update_idletasks()
+        timings["first_paint"] = (perf_counter() - start) * 1000
+
+        # lets the work that's put off until after the first paint run
+        while window.settings_menu.settings_pop_up_menu is None:
+            window.update()
+        for images in window.timer_frame.countdown_images.values():
+            for image in images.values():
+                image.result()
+        timings["deferred_work_done"] = (perf_counter() - start) * 1000
+        timings["asset_decode_total"] = decoding[0] * 1000
+        window.destroy()
+
+    customtkinter.CTk.mainloop = mainloop
+
+    # the app looks its images up in sys._MEIPASS when it's set, so it can
+    # be run from an empty folder
+    sys._MEIPASS = str(REPOSITORY)
+    sys.path.insert(0, str(REPOSITORY))
+    with open(REPOSITORY / "main.py", encoding="utf-8") as f:
+        code = compile(f.read(), str(REPOSITORY / "main.py"), "exec")
+    exec(code, {"__name__": "__main__", "__file__": str(REPOSITORY / "main.py")})
+
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_startup()))
+        return 0
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as folder:
+            process_start = perf_counter()
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                cwd=folder,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            timings = json.loads(output.strip().splitlines()[-1])
+            timings["process"] = (perf_counter() - process_start) * 1000
+            runs.append(timings)
+
+    print(f"runs: {args.runs} (median milliseconds)")
+    for name in runs[0]:
+        print(f"{name + ':':<28}{median(run[name] for run in runs):8.1f}")
+
+    first_paint = median(run["first_paint"] for run in runs)
+    print(f"first paint target: {TARGET_FIRST_PAINT} ms")
+    return 0 if first_paint <= TARGET_FIRST_PAINT else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,458 @@
+"""Measures how fast the app scans folders, shows its first image, changes
+images, and resizes them, along with how much memory it uses, and saves
+the results as JSON so they can be compared between commits.
+
+A folder tree of made up PNG and JPEG images is generated first, with a
+configurable amount of images, depth, and image size. The scan, loading,
+and resizing are measured through the core package. If there's a display,
+the app's window is also opened, and changing and resizing images is
+measured through update_image_original and show_full_image.
+
+Usage (from the root of the repository):
+    python benchmarks/suite.py [--images N] [--depth N] [--fanout N]
+        [--image-size WIDTHxHEIGHT] [--formats png,jpg] [--changes N]
+        [--output results.json] [--no-window]
+    python benchmarks/suite.py --compare old.json new.json
+
+The results are saved in benchmarks/results by default, which git ignores.
+"""
+
+from pathlib import Path
+from platform import platform, python_version
+from random import Random
+from time import perf_counter, strftime
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPOSITORY = Path(__file__).resolve().parent.parent
+RESULTS_FOLDER = REPOSITORY / "benchmarks" / "results"
+sys.path.insert(0, str(REPOSITORY))
+
+from PIL import Image
+
+from core import (
+    FolderScanner,
+    ImageCache,
+    ImagePrefetcher,
+    fit_image,
+    resident_megabytes,
+)
+
+# distinct images made for every format, the rest of the tree are copies
+# of them (the cache keys images by their path, so copies aren't hits)
+TEMPLATES_PER_FORMAT = 6
+
+CANVAS_SIZE = (1200, 800)
+RESIZE_SIZES = [(1200, 800), (900, 700), (600, 500), (1600, 1000), (1200, 800)]
+
+
+def make_template(size: tuple[int, int], seed: int) -> Image.Image:
+    """Returns an image with both noise and smooth gradients in it, so it
+    compresses and decodes roughly like a photo does.
+    """
+    noise = Image.effect_noise(size, 40 + seed % 5 * 10)
+    gradient = Image.linear_gradient("L").resize(size).rotate(seed * 37 % 360)
+    return Image.merge(
+        "RGB", (noise, gradient, Image.blend(noise, gradient, alpha=0.7))
+    )
+
+
+def generate_tree(
+    folder: str,
+    image_amount: int,
+    depth: int,
+    fanout: int,
+    image_size: tuple[int, int],
+    formats: list[str],
+    seed: int,
+) -> list[str]:
+    """Fills folder with image_amount images spread over a tree of
+    sub-folders `depth` levels deep with `fanout` sub-folders in each,
+    and returns the path of every image.
+    """
+    directories = [folder]
+    level = [folder]
+    for depth_index in range(depth):
+        level = [
+            os.path.join(parent, f"set_{depth_index}_{child}")
+            for parent in level
+            for child in range(fanout)
+        ]
+        directories.extend(level)
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+
+    templates = {}
+    for image_format in formats:
+        for template_index in range(TEMPLATES_PER_FORMAT):
+            buffer = io.BytesIO()
+            make_template(image_size, seed + template_index).save(
+                buffer,
+                format="PNG" if image_format == "png" else "JPEG",
+                **({"quality": 90} if image_format != "png" else {}),
+            )
+            templates[image_format, template_index] = buffer.getvalue()
+
+    random = Random(seed)
+    paths = []
+    for index in range(image_amount):
+        image_format = formats[index % len(formats)]
+        path = os.path.join(
+            random.choice(directories), f"IMG_{index:07}.{image_format}"
+        )
+        with open(path, "wb") as f:
+            f.write(templates[image_format, index % TEMPLATES_PER_FORMAT])
+        paths.append(path)
+    return paths
+
+
+def percentiles(timings: list[float]) -> dict[str, float]:
+    """Returns the p50, p99, and maximum of timings in milliseconds."""
+    timings = sorted(timings)
+    return {
+        "count": len(timings),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p99_ms": round(
+            timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 3
+        ),
+        "max_ms": round(timings[-1] * 1000, 3),
+    }
+
+
+def show(image_cache: ImageCache, path: str, canvas_size: tuple[int, int]) -> None:
+    """Does what the app does to show an image, without the PhotoImage
+    and the canvas.
+    """
+    key, image = image_cache.original(path, canvas_size)
+    image_width, image_height, _, _ = fit_image(
+        width=canvas_size[0],
+        height=canvas_size[1],
+        image_ratio=image.size[0] / image.size[1],
+    )
+    image_cache.rendition(key=key, image=image, size=(image_width, image_height))
+
+
+def measure_scan(folder: str, index_folder: str | None) -> dict:
+    """Scans the folder without a main loop. The first image is shown as
+    soon as the first batch comes in, like the app does.
+    """
+    image_cache = ImageCache(max_bytes=512 * 1024 * 1024)
+    timings = {}
+    start = perf_counter()
+
+    def on_batch(scanner: FolderScanner, batch: list[Path]) -> None:
+        if scanner.batches == 1:
+            timings["first_batch"] = perf_counter() - start
+            show(image_cache, str(batch[0]), CANVAS_SIZE)
+            timings["first_image"] = perf_counter() - start
+
+    scanner = FolderScanner(
+        schedule=None,
+        folders=[folder],
+        on_batch=on_batch,
+        on_done=lambda scanner: None,
+        index_folder=index_folder,
+    )
+    scanner.start()
+    scanner.wait()
+    total = perf_counter() - start
+
+    return {
+        "images": scanner.found,
+        "seconds": round(total, 4),
+        "images_per_second": round(scanner.found / total, 1),
+        "time_to_first_batch_ms": round(timings["first_batch"] * 1000, 3),
+        "time_to_first_image_ms": round(timings["first_image"] * 1000, 3),
+    }
+
+
+def measure_image_changes(paths: list[str], changes: int, prefetched: bool) -> dict:
+    """Goes through the images the way the app does, either decoding every
+    image when it's changed to, or giving the prefetcher time to get the
+    next images ready in between, like the timer does.
+    """
+    image_cache = ImageCache(max_bytes=512 * 1024 * 1024)
+    image_prefetcher = ImagePrefetcher(image_cache=image_cache)
+    timings = []
+    if prefetched:
+        image_prefetcher.prefetch(paths[:3], CANVAS_SIZE)
+    for position in range(min(changes, len(paths) - 3)):
+        if prefetched:
+            for _, future in list(image_prefetcher.prefetched.values()):
+                future.exception()
+
+        start = perf_counter()
+        key, image = image_prefetcher.get(paths[position], CANVAS_SIZE)
+        image_width, image_height, _, _ = fit_image(
+            width=CANVAS_SIZE[0],
+            height=CANVAS_SIZE[1],
+            image_ratio=image.size[0] / image.size[1],
+        )
+        image_cache.rendition(key=key, image=image, size=(image_width, image_height))
+        timings.append(perf_counter() - start)
+
+        if prefetched:
+            image_prefetcher.prefetch(paths[position + 1 : position + 4], CANVAS_SIZE)
+
+    image_prefetcher.executor.shutdown(wait=True)
+    return {
+        **percentiles(timings),
+        "cache_hits": image_cache.hits,
+        "cache_misses": image_cache.misses,
+    }
+
+
+def measure_resizes(paths: list[str], rounds: int) -> dict:
+    """Resizes images to the sizes a window is dragged through."""
+    image_cache = ImageCache(max_bytes=512 * 1024 * 1024)
+    timings = []
+    for path in paths[:rounds]:
+        for canvas_size in RESIZE_SIZES:
+            start = perf_counter()
+            show(image_cache, path, canvas_size)
+            timings.append(perf_counter() - start)
+    return percentiles(timings)
+
+
+def measure_window(folder: str, changes: int) -> dict:
+    """Opens the app's window on the folder and measures the time until
+    the first image is shown, every image change, and resizes, through
+    the same methods the buttons use.
+    """
+    import tkinter
+
+    try:
+        tkinter.Tk().destroy()
+    except tkinter.TclError as e:
+        return {"skipped": f"no display ({e})"}
+
+    # the app looks its images up in sys._MEIPASS when it's set, and
+    # keeps its preferences in the current folder
+    sys._MEIPASS = str(REPOSITORY)
+    working_folder = tempfile.mkdtemp()
+    previous_folder = os.getcwd()
+    os.chdir(working_folder)
+    try:
+        import main
+
+        window = main.App(
+            windows_icon=main.resource_path("other_essentials/app_icon.ico"),
+            linux_icon=main.resource_path("other_essentials/app_icon.png"),
+            mac_icon=main.resource_path("other_essentials/app_icon.icns"),
+            geometry=(CANVAS_SIZE[0], CANVAS_SIZE[1] + 200),
+        )
+        window.update()
+        image_frame = window.image_frame
+
+        start = perf_counter()
+        window.open_folders([folder])
+        while image_frame.image_key is None:
+            window.update()
+        window.update_idletasks()
+        first_image = perf_counter() - start
+        while window.folder_scanners:
+            window.update()
+
+        def settle() -> None:
+            """Lets the prefetcher finish, as the timer would."""
+            for _, future in list(image_frame.image_prefetcher.prefetched.values()):
+                future.exception()
+            window.update()
+
+        change_timings = []
+        for _ in range(min(changes, len(image_frame.image_queue) - 1)):
+            settle()
+            start = perf_counter()
+            window.button_frame.change_image(next_or_previous=True)
+            window.update_idletasks()
+            change_timings.append(perf_counter() - start)
+
+        resize_timings = []
+        preview_timings = []
+        for _ in range(10):
+            settle()
+            window.button_frame.change_image(next_or_previous=True)
+            for width, height in RESIZE_SIZES:
+                start = perf_counter()
+                image_frame.show_full_image(width, height, preview=True)
+                window.update_idletasks()
+                preview_timings.append(perf_counter() - start)
+
+                start = perf_counter()
+                image_frame.show_full_image(width, height)
+                window.update_idletasks()
+                resize_timings.append(perf_counter() - start)
+
+        resident = resident_megabytes()
+        window.destroy()
+
+        # everything the app writes goes into the working folder before
+        # it's deleted
+        window.save_load_system.flush()
+        if window.session_history is not None:
+            window.session_history.close()
+        return {
+            "time_to_first_image_ms": round(first_image * 1000, 3),
+            "image_change": percentiles(change_timings),
+            "resize": percentiles(resize_timings),
+            "resize_preview": percentiles(preview_timings),
+            "resident_megabytes": resident,
+        }
+    finally:
+        os.chdir(previous_folder)
+        shutil.rmtree(working_folder, ignore_errors=True)
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPOSITORY,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + name] = value
+    return flat
+
+
+def compare(old_file: str, new_file: str) -> int:
+    """Prints every result of two runs side by side."""
+    with open(old_file, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_file, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"old: {old.get('commit')} ({old.get('created')})")
+    print(f"new: {new.get('commit')} ({new.get('created')})")
+    if old.get("config") != new.get("config"):
+        print("The runs were made with different settings:")
+        print(f"old: {old.get('config')}")
+        print(f"new: {new.get('config')}")
+    old_results = flatten(old["results"])
+    new_results = flatten(new["results"])
+    for name in sorted(old_results.keys() | new_results.keys()):
+        old_value = old_results.get(name)
+        new_value = new_results.get(name)
+        change = ""
+        if old_value and new_value is not None:
+            change = f"{(new_value - old_value) / old_value * 100:+8.1f}%"
+        print(f"{name:<48}{old_value!s:>14}{new_value!s:>14}  {change}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=2_000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--image-size", default="1920x1080")
+    parser.add_argument("--formats", default="png,jpg")
+    parser.add_argument("--changes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        help="default: benchmarks/results/benchmark_results_<commit>.json",
+    )
+    parser.add_argument("--no-window", action="store_true")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    width, height = (int(number) for number in args.image_size.lower().split("x"))
+    formats = [image_format.strip().lower() for image_format in args.formats.split(",")]
+    config = {
+        "images": args.images,
+        "depth": args.depth,
+        "fanout": args.fanout,
+        "image_size": [width, height],
+        "formats": formats,
+        "changes": args.changes,
+        "seed": args.seed,
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        tree = os.path.join(folder, "images")
+        start = perf_counter()
+        paths = generate_tree(
+            folder=tree,
+            image_amount=args.images,
+            depth=args.depth,
+            fanout=args.fanout,
+            image_size=(width, height),
+            formats=formats,
+            seed=args.seed,
+        )
+        print(f"generated {len(paths)} images in {perf_counter() - start:.1f} s")
+        Random(args.seed).shuffle(paths)
+        results["resident_megabytes_at_start"] = resident_megabytes()
+
+        results["scan"] = measure_scan(tree, index_folder=None)
+        index_folder = os.path.join(folder, "scan_index")
+        measure_scan(tree, index_folder=index_folder)
+        results["scan_indexed"] = measure_scan(tree, index_folder=index_folder)
+        print("scan done")
+
+        results["image_change"] = measure_image_changes(
+            paths, args.changes, prefetched=False
+        )
+        results["image_change_prefetched"] = measure_image_changes(
+            paths, args.changes, prefetched=True
+        )
+        results["resize"] = measure_resizes(paths, rounds=10)
+        results["resident_megabytes"] = resident_megabytes()
+        print("image changes done")
+
+        results["window"] = (
+            {"skipped": "--no-window"}
+            if args.no_window
+            else measure_window(tree, args.changes)
+        )
+
+    report = {
+        "version": 1,
+        "created": strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit(),
+        "python": python_version(),
+        "platform": platform(),
+        "config": config,
+        "results": results,
+    }
+    output = Path(
+        args.output
+        or RESULTS_FOLDER / f"benchmark_results_{report['commit'] or 'latest'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    for name, value in flatten(results).items():
+        print(f"{name + ':':<48}{value}")
+    if "skipped" in results["window"]:
+        print(f"window: skipped, {results['window']['skipped']}")
+    print(f"results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
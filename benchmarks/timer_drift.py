@@ -0,0 +1,257 @@
+"""Simulates an hour long session of the timer on a made up clock, with
+ticks that come in late or early and images that take a while to load,
+and checks how far the moments the timer runs out drift from where they
+should be and how often the timer wakes up, against a timer that counts
+down one tick of after(1000) at a time. The ticks are scheduled by the
+same SessionTimer the app uses.
+
+No time actually passes, so an hour takes a fraction of a second.
+
+Usage (from the root of the repository):
+    python benchmarks/timer_drift.py [--seconds N] [--session-minutes N]
+"""
+
+from pathlib import Path
+from random import Random
+from typing import Callable
+import argparse
+import heapq
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import SessionTimer
+
+
+class FakeLoop:
+    """Stands in for Tk's after() and the clock the SessionTimer reads.
+    Every scheduled callback comes in somewhere between early seconds
+    early and late seconds late, and now and then stalls, like it would
+    behind a slow decode on the main thread.
+    """
+
+    def __init__(
+        self, random: Random, early: float, late: float, stall_chance: float
+    ) -> None:
+        self.random = random
+        self.early = early
+        self.late = late
+        self.stall_chance = stall_chance
+
+        self.now = 0.0
+        self.wakeups = 0
+        self._jobs: list[tuple[float, int, Callable[[], None]]] = []
+        self._cancelled: set[int] = set()
+        self._job_id = 0
+
+    def clock(self) -> float:
+        return self.now
+
+    def after(self, milliseconds: int, callback: Callable[[], None]) -> int:
+        delay = milliseconds / 1000 + self.random.uniform(-self.early, self.late)
+        if self.random.random() < self.stall_chance:
+            delay += self.random.uniform(0.1, 0.5)
+        self._job_id += 1
+        heapq.heappush(self._jobs, (self.now + max(0.0, delay), self._job_id, callback))
+        return self._job_id
+
+    def after_cancel(self, job: int) -> None:
+        self._cancelled.add(job)
+
+    def run_until(self, end: float) -> None:
+        """Runs every callback that comes in before end, and moves the
+        clock to end.
+        """
+        while self._jobs and self._jobs[0][0] <= end:
+            due, job, callback = heapq.heappop(self._jobs)
+            if job in self._cancelled:
+                continue
+            self.now = due
+            self.wakeups += 1
+            callback()
+        self.now = end
+
+    def load_image(self) -> None:
+        """Moves the clock on by the time an image takes to load."""
+        self.now += self.random.uniform(0.02, 0.3)
+
+
+class DeadlineTimer:
+    """Drives the SessionTimer the way TimerFrame does: once it runs
+    out, the next image loads and the next image's timer counts on from
+    the deadline that was just reached.
+    """
+
+    def __init__(self, loop: FakeLoop, seconds: int) -> None:
+        self.loop = loop
+        self.seconds = seconds
+        self.session_timer = SessionTimer(
+            clock=loop.clock, schedule=loop.after, cancel=loop.after_cancel
+        )
+
+        # the moments the timer ran out, before the next image loads
+        self.ran_out: list[float] = []
+
+    def start(self) -> None:
+        self.ran_out.append(self.loop.clock())
+        self.session_timer.forget_reached()
+        self.resume(self.seconds)
+
+    def resume(self, seconds: int) -> None:
+        self.session_timer.start(seconds)
+        self.session_timer.run(on_tick=lambda seconds_left: None, on_reached=self.next)
+
+    def pause(self) -> int:
+        self.session_timer.stop()
+        return self.session_timer.seconds_left()
+
+    def next(self) -> None:
+        self.ran_out.append(self.loop.clock())
+        self.loop.load_image()
+        self.resume(self.seconds)
+
+
+class CountingTimer:
+    """A timer that counts down one after(1000) at a time, the way the
+    app did before it had the SessionTimer.
+    """
+
+    def __init__(self, loop: FakeLoop, seconds: int) -> None:
+        self.loop = loop
+        self.seconds = seconds
+        self.temp = 0
+        self.ran_out: list[float] = []
+
+    def start(self) -> None:
+        self.ran_out.append(self.loop.clock())
+        self.temp = self.seconds
+        self.loop.after(1000, self.tick)
+
+    def tick(self) -> None:
+        self.temp -= 1
+        if self.temp > 0:
+            self.loop.after(1000, self.tick)
+            return
+
+        self.ran_out.append(self.loop.clock())
+        self.loop.load_image()
+        self.temp = self.seconds
+        self.loop.after(1000, self.tick)
+
+
+def lateness(ran_out: list[float], seconds: int) -> list[float]:
+    """Returns the milliseconds every time the timer ran out is off from
+    where it should be, seconds apart from the first one.
+    """
+    return [
+        (moment - ran_out[0] - image * seconds) * 1000
+        for image, moment in enumerate(ran_out)
+    ]
+
+
+def simulate(timer_class: type, args: argparse.Namespace) -> dict:
+    loop = FakeLoop(
+        Random(args.seed),
+        early=args.early / 1000,
+        late=args.late / 1000,
+        stall_chance=args.stall_chance,
+    )
+    timer = timer_class(loop=loop, seconds=args.seconds)
+    timer.start()
+    session_seconds = args.session_minutes * 60
+    loop.run_until(session_seconds)
+
+    # a single tick can always come in late, drift is how late the last
+    # images are on the whole
+    late = lateness(timer.ran_out, args.seconds)
+    return {
+        "drift": sorted(late[-10:])[len(late[-10:]) // 2],
+        "worst": max(late),
+        "changes": len(late) - 1,
+        "wakeups": loop.wakeups,
+        "session_seconds": session_seconds,
+    }
+
+
+def paused_wakeups(args: argparse.Namespace) -> tuple[int, int]:
+    """Pauses the deadline timer partway through an image and returns
+    how many times it woke up while paused, and the seconds it had left
+    on the image.
+    """
+    loop = FakeLoop(Random(args.seed), early=0, late=args.late / 1000, stall_chance=0)
+    timer = DeadlineTimer(loop=loop, seconds=args.seconds)
+    timer.start()
+    loop.run_until(args.seconds / 2 + 0.25)
+    seconds_left = timer.pause()
+
+    wakeups = loop.wakeups
+    loop.run_until(loop.now + args.pause_minutes * 60)
+    paused = loop.wakeups - wakeups
+
+    timer.resume(seconds_left)
+    return paused, seconds_left
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=30, help="per image")
+    parser.add_argument("--session-minutes", type=int, default=60)
+    parser.add_argument("--pause-minutes", type=int, default=10)
+    parser.add_argument(
+        "--early", type=float, default=1, help="milliseconds ticks can be early by"
+    )
+    parser.add_argument(
+        "--late", type=float, default=15, help="milliseconds ticks can be late by"
+    )
+    parser.add_argument("--stall-chance", type=float, default=0.01)
+    parser.add_argument(
+        "--max-drift",
+        type=float,
+        default=50,
+        help="the milliseconds the timer may drift by",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {
+        "SessionTimer": simulate(DeadlineTimer, args),
+        "after(1000)": simulate(CountingTimer, args),
+    }
+
+    print(
+        f"{'timer':<14}{'changes':>9}{'drift ms':>11}{'worst ms':>11}"
+        f"{'wakeups':>9}{'per s':>7}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<14}{result['changes']:>9}{result['drift']:>11.1f}"
+            f"{result['worst']:>11.1f}"
+            f"{result['wakeups']:>9}"
+            f"{result['wakeups'] / result['session_seconds']:>7.3f}"
+        )
+
+    paused, seconds_left = paused_wakeups(args)
+    print(
+        f"wakeups during a {args.pause_minutes} minute pause: {paused} "
+        f"({seconds_left} s left on the image)"
+    )
+
+    failures = []
+    result = results["SessionTimer"]
+    if abs(result["drift"]) > args.max_drift:
+        failures.append(f"the timer drifted by {result['drift']:.1f} ms")
+
+    # one wakeup at the start of every second, and a few more for ticks
+    # that came in too early to count
+    if result["wakeups"] > result["session_seconds"] * 1.01:
+        failures.append(f"the timer woke up {result['wakeups']} times")
+    if paused:
+        failures.append(f"the timer woke up {paused} times while paused")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""The parts of Image References that don't need a display: scanning
+folders for images, the image queue, the session timer, loading images,
+and timing and tracing each of those. The window in main.py drives
+these and only draws what they hold, so they can be imported, tested,
+and benchmarked on their own.
+"""
+
+from .image_queue import ImageQueue, ImageSession, ShuffledOrder
+from .library import FolderScanner, ReservoirSampler, ScanIndex, is_image_file
+from .loader import ImageCache, ImagePrefetcher, fit_image
+from .path_table import PathTable
+from .profiling import LatencyHistogram, Profiler, resident_megabytes
+from .session_history import SessionHistory
+from .timer import SessionTimer
+from .tracing import EventTrace
+
+__all__ = [
+    "EventTrace",
+    "FolderScanner",
+    "ImageCache",
+    "ImagePrefetcher",
+    "ImageQueue",
+    "ImageSession",
+    "LatencyHistogram",
+    "PathTable",
+    "Profiler",
+    "ReservoirSampler",
+    "ScanIndex",
+    "SessionHistory",
+    "SessionTimer",
+    "ShuffledOrder",
+    "fit_image",
+    "is_image_file",
+    "resident_megabytes",
+]
@@ -0,0 +1,506 @@
+"""Scanning folders for images in the background."""
+
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+from math import exp, floor, log, log1p
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from random import Random
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Any, Callable, Iterator
+import json
+import os
+import sys
+import traceback
+
+
+class ReservoirSampler:
+    """Picks a uniformly random sample of a fixed size out of a stream of
+    items whose length isn't known ahead of time, without remembering
+    the items that weren't picked.
+
+    The first `size` items fill the sample, and every item after that
+    replaces a random item of the sample with a chance of size / items
+    seen. Instead of rolling for every item, the amount of items to
+    skip until the next replacement is drawn directly (Algorithm L),
+    so the cost only grows with the amount of replacements.
+    """
+
+    def __init__(self, size: int, random: Random | None = None) -> None:
+        """
+        Initializes a new ReservoirSampler object.
+
+        :param size: The amount of items in the sample.
+        :param random: The random number generator to use.
+        """
+        self.size = size
+        self.seen = 0
+        self._random = random if random is not None else Random()
+        self._weight = exp(log(self._uniform()) / size)
+        self._next = size + self._skip()
+
+    @property
+    def full(self) -> bool:
+        return self.seen >= self.size
+
+    def take(self, amount: int) -> Iterator[tuple[int, int]]:
+        """Offers the next `amount` items of the stream to the sample.
+
+        :param amount: The amount of items offered.
+        :return: The (offset in the offered items, index in the sample)
+        of every item that's picked, in order. Items picked while the
+        sample is being filled get the next free index.
+        """
+        start = self.seen
+        end = start + amount
+        self.seen = end
+
+        for item in range(start, min(end, self.size)):
+            yield item - start, item
+
+        while self._next < end:
+            yield self._next - start, self._random.randrange(self.size)
+            self._weight *= exp(log(self._uniform()) / self.size)
+            self._next += self._skip() + 1
+
+    def _uniform(self) -> float:
+        value = self._random.random()
+        while value == 0.0:
+            value = self._random.random()
+        return value
+
+    def _skip(self) -> int:
+        if self._weight >= 1.0:
+            return 0
+        if self._weight <= 0.0:
+            return sys.maxsize
+        return floor(log(self._uniform()) / log1p(-self._weight))
+
+
+class FolderScanner:
+    """Walks one or more folders and all of their sub-folders on worker
+    threads, and hands the images it finds back to the main loop in
+    batches so that the window never freezes while large folders are
+    scanned. Without a main loop, poll() or wait() hand the batches over
+    instead.
+    """
+
+    image_suffixes = (".png", ".jpg", ".jpeg")
+
+    def __init__(
+        self,
+        schedule: Callable[[int, Callable[[], None]], Any] | None,
+        folders: list[str],
+        on_batch: Callable[["FolderScanner", list[Path]], None],
+        on_done: Callable[["FolderScanner"], None],
+        index_folder: str | None = None,
+        sample_size: int | None = None,
+        on_replace: (
+            Callable[["FolderScanner", list[tuple[int, Path]]], None] | None
+        ) = None,
+        max_workers: int = 4,
+        batch_size: int = 500,
+        batch_interval: float = 0.2,
+        poll_interval: int = 50,
+    ) -> None:
+        """
+        Initializes a new FolderScanner object.
+
+        :param schedule: Schedules a call on the main loop after an
+        amount of milliseconds, like the after() of a Tk window. The
+        batches are handed over on the main loop through it. If None,
+        poll() or wait() have to be called instead.
+        :param folders: The folders to scan. Every folder is walked on
+        its own worker thread.
+        :param on_batch: Called on the main loop with every batch of
+        image paths found.
+        :param on_done: Called on the main loop once every folder is
+        finished or the scan is cancelled.
+        :param index_folder: The folder where the ScanIndex of every
+        scanned folder is kept. If given, only the directories that
+        changed since the last scan are listed.
+        :param sample_size: If given, only a random sample of this many
+        images is kept out of every image found. The sample is handed
+        to on_batch once it's filled, and the images it swaps out after
+        that are handed to on_replace.
+        :param on_replace: Called on the main loop with the (index,
+        image path) pairs that replace images of the sample.
+        :param max_workers: The maximum amount of folders walked at the
+        same time.
+        :param batch_size: The amount of images in a full batch.
+        :param batch_interval: The maximum amount of seconds an
+        unfinished batch is held back for.
+        :param poll_interval: The amount of milliseconds between every
+        check for new batches.
+        """
+        self.schedule = schedule
+        self.folders = folders
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.index_folder = index_folder
+        self.sample_size = sample_size
+        self.on_replace = on_replace
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.poll_interval = poll_interval
+
+        # the amount of images found so far, in total and for every
+        # folder, and the amount of batches handed to on_batch
+        self.found = 0
+        self.found_in = {folder: 0 for folder in folders}
+        self.batches = 0
+        self.first_batch_size = 0
+        self.cancelled = False
+
+        # when the scan was started, on the monotonic clock
+        self.started_at: float | None = None
+
+        self._cancel_event = Event()
+        self._batches: SimpleQueue = SimpleQueue()
+
+        # the sample is shared by every worker, along with the images it
+        # picked that haven't been sent yet
+        self._sampler = ReservoirSampler(sample_size) if sample_size else None
+        self._sample_lock = Lock()
+        self._sample_filled = 0
+        self._sample_batch: list[Path] = []
+        self._sample_replacements: list[tuple[int, Path]] = []
+        self._sample_found = {folder: 0 for folder in folders}
+        self._sample_sent = monotonic()
+
+        self._thread = Thread(target=self._walk, daemon=True)
+
+    def start(self) -> None:
+        self.started_at = monotonic()
+        self._thread.start()
+        if self.schedule is not None:
+            self.schedule(self.poll_interval, self._poll)
+
+    def cancel(self) -> None:
+        """Stops the scan. Batches that haven't been handed to on_batch
+        yet are thrown away.
+        """
+        self.cancelled = True
+        self._cancel_event.set()
+
+    def _walk(self) -> None:
+        """Runs on its own thread and walks every folder on a pool of
+        worker threads.
+        """
+        try:
+            with ThreadPoolExecutor(
+                max_workers=max(1, min(self.max_workers, len(self.folders)))
+            ) as executor:
+                futures = [
+                    (folder, executor.submit(self._walk_folder, folder))
+                    for folder in self.folders
+                ]
+                for folder, future in futures:
+                    try:
+                        future.result()
+                    except OSError as e:
+                        print(f"FolderScanWarning: {e}")
+                    except Exception as e:
+                        print(f"FolderScanWarning: Scanning {folder} failed:")
+                        traceback.print_exception(e)
+
+            if self._sampler is not None:
+                with self._sample_lock:
+                    self._send_sample()
+        except Exception as e:
+            print("FolderScanWarning: The scan failed:")
+            traceback.print_exception(e)
+        finally:
+            # tells _poll that the walk is over, even if it failed, so
+            # that on_done is always called
+            self._batches.put(None)
+
+    def _walk_folder(self, folder: str) -> None:
+        """Runs on a worker thread. The first image is sent on its own
+        so it can be shown right away, the rest are sent in batches.
+        """
+        scan_index = (
+            ScanIndex(folder=folder, index_folder=self.index_folder)
+            if self.index_folder is not None
+            else None
+        )
+        batch = []
+        batch_limit = 1
+        last_sent = monotonic()
+        for dir_path, image_names in self._image_names(folder, scan_index):
+            if self._cancel_event.is_set():
+                break
+
+            if self._sampler is not None:
+                self._sample(folder, dir_path, image_names)
+                continue
+
+            for image_name in image_names:
+                batch.append(Path(dir_path, image_name))
+
+                if len(batch) >= batch_limit:
+                    self._batches.put(({folder: len(batch)}, batch, []))
+                    batch = []
+                    batch_limit = self.batch_size
+                    last_sent = monotonic()
+
+            if batch and monotonic() - last_sent >= self.batch_interval:
+                self._batches.put(({folder: len(batch)}, batch, []))
+                batch = []
+                last_sent = monotonic()
+
+        if batch:
+            self._batches.put(({folder: len(batch)}, batch, []))
+
+        if scan_index is not None and not self._cancel_event.is_set():
+            scan_index.save()
+
+    def _sample(self, folder: str, dir_path: str, image_names: list[str]) -> None:
+        """Runs on a worker thread and offers the images of a directory
+        to the sample. Only the images the sample picks are turned into
+        paths. Nothing is sent until the sample is filled, unless it
+        takes longer than batch_interval.
+        """
+        with self._sample_lock:
+            for offset, index in self._sampler.take(len(image_names)):
+                path = Path(dir_path, image_names[offset])
+                if index == self._sample_filled:
+                    self._sample_batch.append(path)
+                    self._sample_filled += 1
+                else:
+                    self._sample_replacements.append((index, path))
+            self._sample_found[folder] += len(image_names)
+
+            if (
+                (self._sample_batch or self._sample_replacements) and self._sampler.full
+            ) or monotonic() - self._sample_sent >= self.batch_interval:
+                self._send_sample()
+
+    def _send_sample(self) -> None:
+        """Sends the images the sample picked since the last time. Has
+        to be called with _sample_lock held, so that the images are sent
+        in the same order they were picked in.
+        """
+        self._batches.put(
+            (
+                self._sample_found,
+                self._sample_batch,
+                self._sample_replacements,
+            )
+        )
+        self._sample_found = {folder: 0 for folder in self.folders}
+        self._sample_batch = []
+        self._sample_replacements = []
+        self._sample_sent = monotonic()
+
+    def _image_names(
+        self, folder: str, scan_index: "ScanIndex | None"
+    ) -> Iterator[tuple[str, list[str]]]:
+        """Yields every directory inside the folder along with the names
+        of the images directly inside of it.
+        """
+        if scan_index is not None:
+            scan_index.load()
+            yield from scan_index.walk(self._cancel_event)
+            return
+
+        for dir_path, _, file_names in os.walk(folder):
+            yield dir_path, [
+                file_name
+                for file_name in file_names
+                if is_image_file(file_name, self.image_suffixes)
+            ]
+
+    def poll(self, timeout: float = 0.0) -> bool:
+        """Hands every batch that's ready over to on_batch, waiting up to
+        timeout seconds for the first one. Returns True once the scan is
+        done and on_done has been called.
+        """
+        while True:
+            try:
+                item = self._batches.get(block=timeout > 0, timeout=timeout)
+            except Empty:
+                return False
+            timeout = 0.0
+
+            if item is None:
+                self.on_done(self)
+                return True
+
+            found, batch, replacements = item
+            if self.cancelled:
+                continue
+
+            for folder, amount in found.items():
+                self.found += amount
+                self.found_in[folder] += amount
+            if batch:
+                self.batches += 1
+                if not self.first_batch_size:
+                    self.first_batch_size = len(batch)
+                self.on_batch(self, batch)
+            if self._sampler is not None and self.on_replace is not None:
+                self.on_replace(self, replacements)
+
+    def wait(self) -> None:
+        """Hands the batches over as soon as they're ready until the scan
+        is done, for scans that don't run on a main loop.
+        """
+        while not self.poll(timeout=self.poll_interval / 1000):
+            pass
+
+    def _poll(self) -> None:
+        """Runs on the main loop."""
+        if not self.poll():
+            self.schedule(self.poll_interval, self._poll)
+
+
+class ScanIndex:
+    """Remembers the images and sub-folders inside every directory of a
+    folder along with each directory's modification time, so that the
+    folder can be scanned again by only re-listing the directories that
+    changed since the last scan.
+    """
+
+    version = 1
+
+    def __init__(self, folder: str, index_folder: str) -> None:
+        """
+        Initializes a new ScanIndex object.
+
+        :param folder: The folder that's indexed.
+        :param index_folder: The folder the index files are saved in.
+        """
+        self.folder = os.path.abspath(folder)
+        self.file_name = self.index_file_name(self.folder, index_folder)
+
+        # relative directory path -> [modification time in nanoseconds,
+        # image names, sub-folder names]
+        self.directories: dict[str, list] = {}
+
+        # the amount of directories that had to be listed again during
+        # the last walk
+        self.listed = 0
+
+    @staticmethod
+    def index_file_name(folder: str, index_folder: str) -> str:
+        folder_hash = sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()
+        return os.path.join(index_folder, f"{folder_hash[:16]}.json")
+
+    @classmethod
+    def prune(cls, index_folder: str, folders: list[str]) -> None:
+        """Deletes the index files of folders that aren't saved anymore."""
+        keep = {
+            os.path.basename(cls.index_file_name(folder, index_folder))
+            for folder in folders
+        }
+        try:
+            file_names = os.listdir(index_folder)
+        except FileNotFoundError:
+            return
+
+        for file_name in file_names:
+            if file_name.endswith(".json") and file_name not in keep:
+                try:
+                    os.remove(os.path.join(index_folder, file_name))
+                except OSError as e:
+                    print(f"ScanIndexWarning: Could not delete {file_name}: {e}")
+
+    def load(self) -> None:
+        """Loads the index file. A missing, outdated, or broken index
+        file is treated as an empty index.
+        """
+        try:
+            with open(self.file_name, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data["version"] == self.version and data["folder"] == self.folder:
+                self.directories = data["directories"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"ScanIndexWarning: Ignoring broken index {self.file_name}: {e}")
+
+    def save(self) -> None:
+        """Saves the index by writing it into a temporary file first and
+        then replacing the old index with it. Nothing is saved if the
+        folder itself couldn't be found.
+        """
+        if not self.directories:
+            return
+
+        data = {
+            "version": self.version,
+            "folder": self.folder,
+            "directories": self.directories,
+        }
+        temp_file_name = f"{self.file_name}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.file_name), exist_ok=True)
+            with open(temp_file_name, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(temp_file_name, self.file_name)
+        except OSError as e:
+            print(f"ScanIndexWarning: Could not save {self.file_name}: {e}")
+
+    def walk(self, cancel_event: Event) -> Iterator[tuple[str, list[str]]]:
+        """Yields every directory inside the folder along with the names
+        of the images directly inside of it. Directories whose
+        modification time hasn't changed are not listed again.
+        """
+        directories = {}
+        self.listed = 0
+        stack = [os.curdir]
+        while stack:
+            if cancel_event.is_set():
+                return
+
+            relative_path = stack.pop()
+            dir_path = os.path.normpath(os.path.join(self.folder, relative_path))
+            try:
+                modified_time = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+
+            entry = self.directories.get(relative_path)
+            if entry is None or entry[0] != modified_time:
+                entry = [modified_time, *self._list_directory(dir_path)]
+                self.listed += 1
+            directories[relative_path] = entry
+
+            yield dir_path, entry[1]
+
+            stack.extend(
+                os.path.join(relative_path, sub_folder)
+                for sub_folder in reversed(entry[2])
+            )
+
+        self.directories = directories
+
+    @staticmethod
+    def _list_directory(dir_path: str) -> tuple[list[str], list[str]]:
+        image_names = []
+        sub_folders = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                sub_folders.append(entry.name)
+                        elif is_image_file(entry.name, FolderScanner.image_suffixes):
+                            image_names.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"ScanIndexWarning: Could not list {dir_path}: {e}")
+        return image_names, sub_folders
+
+
+def is_image_file(file_name: str, image_suffixes: tuple[str, ...]) -> bool:
+    """Checks the file extension of a file name (make sure to make the
+    file suffix lowercase beforehand).
+    (Thanks to @fashoomp from the Python discord server)
+    """
+    return os.path.splitext(file_name)[1].lower() in image_suffixes
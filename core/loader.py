@@ -0,0 +1,279 @@
+"""Loading images from the disk, and keeping them around."""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+import os
+
+from PIL import Image
+
+from .profiling import Profiler
+from .tracing import EventTrace
+
+
+class ImageCache:
+    """A least-recently-used cache of decoded images and their resized
+    versions that holds at most max_bytes worth of pixels. Images are
+    keyed by their path, their modification time, and the size they're
+    resized to (None for the decoded image itself).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        profiler: Profiler | None = None,
+        trace: EventTrace | None = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.trace = trace if trace is not None else EventTrace()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._images: OrderedDict[tuple, Image.Image] = OrderedDict()
+
+        # the prefetcher's worker threads use the cache too
+        self._lock = Lock()
+
+    @staticmethod
+    def image_key(path: str) -> tuple[str, int]:
+        return path, os.stat(path).st_mtime_ns
+
+    @staticmethod
+    def image_bytes(image: Image.Image) -> int:
+        return image.size[0] * image.size[1] * len(image.getbands())
+
+    def get(self, key: tuple) -> Image.Image | None:
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._images.move_to_end(key)
+            return image
+
+    def put(self, key: tuple, image: Image.Image) -> None:
+        image_bytes = self.image_bytes(image)
+        if image_bytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._images:
+                self.used_bytes -= self.image_bytes(self._images.pop(key))
+            self._images[key] = image
+            self.used_bytes += image_bytes
+
+            # throws away the least recently used images
+            while self.used_bytes > self.max_bytes:
+                _, old_image = self._images.popitem(last=False)
+                self.used_bytes -= self.image_bytes(old_image)
+
+    def original(
+        self, path: str, canvas_size: tuple[int, int] | None = None
+    ) -> tuple[tuple[str, int], Image.Image]:
+        """Returns the key and the decoded image of a path, decoding it
+        if it's not cached yet or if the cached image was decoded too
+        small for the canvas size.
+        """
+        key = self.image_key(path)
+        image = self.get((*key, None))
+        if image is None or self.too_small(image, canvas_size):
+            with self.trace.span("decode", "image", path=path):
+                image = self.decode(path, canvas_size)
+            self.put((*key, None), image)
+        return key, image
+
+    def decode(
+        self, path: str, canvas_size: tuple[int, int] | None = None
+    ) -> Image.Image:
+        """Decodes an image at roughly the size it's shown at instead of
+        its full size. JPEGs are decoded at a smaller scale to begin
+        with, other formats are decoded fully and then shrunk.
+        The full size is kept in image.info["full_size"].
+        """
+        with self.profiler.stage("file_open"):
+            image = Image.open(path)
+        full_size = image.size
+        if canvas_size is None or canvas_size[0] <= 1 or canvas_size[1] <= 1:
+            with self.profiler.stage("decode"):
+                image.load()
+            image.info["full_size"] = full_size
+            return image
+
+        image_width, image_height, _, _ = fit_image(
+            width=canvas_size[0],
+            height=canvas_size[1],
+            image_ratio=full_size[0] / full_size[1],
+        )
+        with self.profiler.stage("decode"):
+            image.draft(None, (image_width, image_height))
+            image.load()
+
+            reduce_factor = min(
+                image.size[0] // max(image_width, 1),
+                image.size[1] // max(image_height, 1),
+            )
+            if reduce_factor >= 2:
+                image = self.reducible(image).reduce(reduce_factor)
+
+        image.info["full_size"] = full_size
+        return image
+
+    @staticmethod
+    def reducible(image: Image.Image) -> Image.Image:
+        """Converts palette, 1-bit, and 16-bit images into a mode that
+        Image.reduce() works with, every other image is returned as is.
+        """
+        if image.mode == "P":
+            return image.convert("RGBA" if "transparency" in image.info else "RGB")
+        if image.mode == "1":
+            return image.convert("L")
+        if image.mode.startswith("I;16"):
+            return image.convert("I")
+        return image
+
+    @staticmethod
+    def too_small(image: Image.Image, canvas_size: tuple[int, int] | None) -> bool:
+        """Checks if an image was decoded smaller than its full size and
+        smaller than what the canvas size needs.
+        """
+        full_size = image.info.get("full_size", image.size)
+        if image.size == full_size:
+            return False
+        if canvas_size is None:
+            return True
+
+        image_width, image_height, _, _ = fit_image(
+            width=canvas_size[0],
+            height=canvas_size[1],
+            image_ratio=full_size[0] / full_size[1],
+        )
+        return image.size[0] < image_width or image.size[1] < image_height
+
+    def rendition(
+        self, key: tuple[str, int], image: Image.Image, size: tuple[int, int]
+    ) -> Image.Image:
+        """Returns the image resized to the given size, resizing it if
+        it's not cached yet.
+        """
+        resized_image = self.get((*key, size))
+        if resized_image is None:
+            with self.profiler.stage("resize"):
+                resized_image = image.resize(size)
+            self.put((*key, size), resized_image)
+        return resized_image
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "images": len(self._images),
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class ImagePrefetcher:
+    """Decodes and resizes images on a pool of worker threads ahead of
+    time and keeps them in an ImageCache, so that the image displayer
+    can swap to an image that is already loaded.
+    """
+
+    def __init__(self, image_cache: ImageCache, max_workers: int = 2) -> None:
+        self.image_cache = image_cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # path -> (canvas size the image is resized for, future that
+        # returns the image's key and the decoded image)
+        self.prefetched: dict[str, tuple[tuple[int, int], Future]] = {}
+
+    def prefetch(self, paths: list[str], canvas_size: tuple[int, int]) -> None:
+        """Starts decoding the given images in order, and forgets every
+        other image that was prefetched before.
+        """
+        for path in list(self.prefetched):
+            if path not in paths:
+                self.prefetched.pop(path)[1].cancel()
+
+        for path in paths:
+            if path in self.prefetched and self.prefetched[path][0] == canvas_size:
+                continue
+            self.prefetched[path] = (
+                canvas_size,
+                self.executor.submit(self._decode, path, canvas_size),
+            )
+
+    def stats(self) -> dict[str, int]:
+        """Returns how many images are prefetched and how many of them
+        are ready to be shown.
+        """
+        prefetched = list(self.prefetched.values())
+        return {
+            "prefetched": len(prefetched),
+            "ready": sum(future.done() for _, future in prefetched),
+        }
+
+    def get(
+        self, path: str, canvas_size: tuple[int, int]
+    ) -> tuple[tuple[str, int], Image.Image]:
+        """Returns the key and the decoded image of a path. Waits for the
+        image if it's already being decoded, and decodes it right away
+        if it's neither prefetched nor cached.
+        """
+        prefetched_size, future = self.prefetched.pop(path, (None, None))
+        if future is not None and not future.cancel():
+            try:
+                key, image = future.result()
+                if prefetched_size == canvas_size:
+                    return key, image
+            except (OSError, ValueError) as e:
+                print(f"PrefetchWarning: Could not prefetch {path}: {e}")
+
+        return self.image_cache.original(path, canvas_size)
+
+    def _decode(
+        self, path: str, canvas_size: tuple[int, int]
+    ) -> tuple[tuple[str, int], Image.Image]:
+        """Runs on a worker thread."""
+        key, image = self.image_cache.original(path, canvas_size)
+
+        width, height = canvas_size
+        if width > 1 and height > 1:
+            image_width, image_height, _, _ = fit_image(
+                width=width, height=height, image_ratio=image.size[0] / image.size[1]
+            )
+            self.image_cache.rendition(
+                key=key, image=image, size=(image_width, image_height)
+            )
+        return key, image
+
+
+def fit_image(width: int, height: int, image_ratio: float) -> tuple[int, int, int, int]:
+    """Returns the size an image needs to be to fit inside a canvas
+    while keeping its ratio, along with the offsets that centralize it.
+    """
+    # current ratio
+    canvas_ratio = width / height
+
+    # declare the alignment variables and set them as 0 by default.
+    to_canvas_middle = 0
+    to_canvas_middle_height = 0
+
+    # get coordinates
+    if canvas_ratio > image_ratio:
+        # If canvas is wider than image
+        image_width = int(height * image_ratio)
+        image_height = int(height)
+        to_canvas_middle = int((width - image_width) / 2)
+
+    else:  # if canvas is narrower than the image
+        image_width = int(width)
+        image_height = int(width / image_ratio)
+        to_canvas_middle_height = int((height - image_height) / 2)
+
+    return image_width, image_height, to_canvas_middle, to_canvas_middle_height
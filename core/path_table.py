@@ -0,0 +1,99 @@
+"""A compact list of image paths for very large folders."""
+
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator
+import os
+
+
+class PathTable:
+    """A list of image paths that keeps every directory once, and packs
+    the file names of every image into a single buffer instead of
+    keeping one Path object per image. An image costs 14 bytes plus
+    the length of its file name (in bytes), against the few hundred
+    bytes a Path object takes. Images are still looked up by their
+    index in constant time, and are only turned into Path objects when
+    they're looked up.
+    """
+
+    def __init__(self, paths: Iterable[Path | str] = ()) -> None:
+        """
+        Initializes a new PathTable object.
+
+        :param paths: The image paths the table starts with.
+        """
+        # every directory, and the index of every directory
+        self._directories: list[str] = []
+        self._directory_ids: dict[str, int] = {}
+
+        # the directory, and where the file name starts in _names and
+        # how long it is, of every image
+        self._directory_of = array("I")
+        self._name_starts = array("Q")
+        self._name_lengths = array("H")
+        self._names = bytearray()
+
+        self.extend(paths)
+
+    def __len__(self) -> int:
+        return len(self._directory_of)
+
+    def __getitem__(self, index: int) -> Path:
+        start = self._name_starts[index]
+        name = self._names[start : start + self._name_lengths[index]]
+        return Path(
+            self._directories[self._directory_of[index]], os.fsdecode(bytes(name))
+        )
+
+    def __setitem__(self, index: int, path: Path | str) -> None:
+        """Replaces the image at an index. The file name of the old image
+        is left in the buffer, so this is only meant for the occasional
+        replacement.
+        """
+        directory_id, start, length = self._pack(path)
+        self._directory_of[index] = directory_id
+        self._name_starts[index] = start
+        self._name_lengths[index] = length
+
+    def __iter__(self) -> Iterator[Path]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, path: Path | str) -> None:
+        directory_id, start, length = self._pack(path)
+        self._directory_of.append(directory_id)
+        self._name_starts.append(start)
+        self._name_lengths.append(length)
+
+    def extend(self, paths: Iterable[Path | str]) -> None:
+        for path in paths:
+            self.append(path)
+
+    def nbytes(self) -> int:
+        """Returns the amount of bytes the images take up, not counting
+        the directories.
+        """
+        return (
+            len(self._names)
+            + self._directory_of.itemsize * len(self._directory_of)
+            + self._name_starts.itemsize * len(self._name_starts)
+            + self._name_lengths.itemsize * len(self._name_lengths)
+        )
+
+    def _pack(self, path: Path | str) -> tuple[int, int, int]:
+        """Adds the file name of a path to the buffer, and returns the
+        index of its directory along with where its file name starts
+        and how long it is.
+        """
+        directory, file_name = os.path.split(os.fspath(path))
+
+        directory_id = self._directory_ids.get(directory)
+        if directory_id is None:
+            directory_id = len(self._directories)
+            self._directories.append(directory)
+            self._directory_ids[directory] = directory_id
+
+        name = os.fsencode(file_name)
+        start = len(self._names)
+        self._names += name
+        return directory_id, start, len(name)
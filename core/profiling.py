@@ -0,0 +1,257 @@
+"""Opt-in timing of the stages an image goes through before it's shown."""
+
+from contextlib import nullcontext
+from math import ceil
+from threading import Lock
+from time import perf_counter
+from typing import Callable
+import json
+import os
+import sys
+
+# returned by Profiler.stage() while profiling is off, so that timing a
+# stage costs next to nothing then
+NOT_TIMED = nullcontext()
+
+
+class LatencyHistogram:
+    """A histogram of latencies in the style of an HDR histogram. Every
+    power of two is split into the same amount of equally sized buckets,
+    so every latency is kept with the same relative precision (about
+    1.6% with 6 significant bits) from microseconds up to hours, in a
+    few hundred buckets at most.
+    """
+
+    def __init__(self, significant_bits: int = 6) -> None:
+        self.sub_buckets = 1 << significant_bits
+        self.significant_bits = significant_bits
+
+        # bucket index -> amount of latencies in the bucket
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.last = None
+
+    def bucket(self, microseconds: int) -> int:
+        """Returns the index of the bucket a latency goes into."""
+        if microseconds < self.sub_buckets:
+            return microseconds
+        shift = microseconds.bit_length() - self.significant_bits - 1
+        return (
+            (shift + 1) * self.sub_buckets + (microseconds >> shift) - self.sub_buckets
+        )
+
+    def highest_in_bucket(self, index: int) -> int:
+        """Returns the highest latency that goes into a bucket."""
+        if index < self.sub_buckets:
+            return index
+        shift, sub_bucket = divmod(index - self.sub_buckets, self.sub_buckets)
+        return ((self.sub_buckets + sub_bucket + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        microseconds = max(0, round(seconds * 1_000_000))
+        index = self.bucket(microseconds)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += microseconds
+        self.last = microseconds
+        if self.min is None or microseconds < self.min:
+            self.min = microseconds
+        if self.max is None or microseconds > self.max:
+            self.max = microseconds
+
+    def percentile(self, percent: float) -> float:
+        """Returns the latency in milliseconds that percent percent of the
+        recorded latencies are at or under.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = max(1, ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.highest_in_bucket(index), self.max) / 1000
+        return self.max / 1000
+
+    def summary(self) -> dict[str, int | float]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min_ms": self.min / 1000,
+            "mean_ms": round(self.total / self.count / 1000, 3),
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "p999_ms": self.percentile(99.9),
+            "max_ms": self.max / 1000,
+        }
+
+
+class _Stage:
+    """Times a `with` block and records it in a Profiler."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = self.profiler.clock()
+
+    def __exit__(self, *_) -> None:
+        self.profiler.record(self.name, self.profiler.clock() - self.start)
+
+
+class Profiler:
+    """Keeps a LatencyHistogram of every stage that's timed through it.
+    Stages can be timed from any thread. While the profiler is disabled
+    nothing is timed or recorded.
+
+    Usage:
+        with profiler.stage("decode"):
+            image.load()
+    """
+
+    def __init__(
+        self, enabled: bool = False, clock: Callable[[], float] = perf_counter
+    ) -> None:
+        self.enabled = enabled
+        self.clock = clock
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def enabled_by_environment(variable: str = "IMAGE_REFERENCES_PROFILE") -> bool:
+        """Checks if profiling has been turned on through an environment
+        variable, any value other than empty or 0 turns it on.
+        """
+        return os.environ.get(variable, "") not in ("", "0")
+
+    def stage(self, name: str) -> "_Stage | nullcontext":
+        """Returns a context manager that times its block as the given
+        stage.
+        """
+        if not self.enabled:
+            return NOT_TIMED
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Records a latency that's been timed some other way."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = LatencyHistogram()
+            self.histograms[name].record(seconds)
+
+    def last(self, name: str) -> float | None:
+        """Returns the latest latency of a stage in milliseconds, or None
+        if it hasn't been timed yet.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None or histogram.last is None:
+            return None
+        return histogram.last / 1000
+
+    def percentile(self, name: str, percent: float) -> float | None:
+        """Returns a percentile of a stage in milliseconds, or None if it
+        hasn't been timed yet.
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                return None
+            return histogram.percentile(percent)
+
+    def report(self) -> dict[str, dict[str, int | float]]:
+        with self._lock:
+            return {
+                name: histogram.summary()
+                for name, histogram in sorted(self.histograms.items())
+            }
+
+    def report_text(self) -> str:
+        """Returns the report as a table."""
+        lines = [f"{'stage':<24}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, summary in self.report().items():
+            lines.append(
+                f"{name:<24}{summary['count']:>8}{summary['p50_ms']:>10.3f}"
+                f"{summary['p99_ms']:>10.3f}{summary['max_ms']:>10.3f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, file_name: str) -> None:
+        """Writes the report into a JSON file, if anything was timed."""
+        report = self.report()
+        if not report:
+            return
+        try:
+            with open(file_name, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+        except OSError as e:
+            print(f"ProfileWarning: Could not save {file_name}: {e}")
+
+
+def resident_megabytes() -> float | None:
+    """Returns the memory the process is using right now, or the most it
+    has used if that's all that can be read (on macOS). Returns None if
+    neither can be read.
+    """
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        try:
+            get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+            get_current_process.restype = wintypes.HANDLE
+            get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_process_memory_info.argtypes = [
+                wintypes.HANDLE,
+                ctypes.POINTER(ProcessMemoryCounters),
+                wintypes.DWORD,
+            ]
+            get_process_memory_info.restype = wintypes.BOOL
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if not get_process_memory_info(
+                get_current_process(), ctypes.byref(counters), counters.cb
+            ):
+                return None
+            return counters.WorkingSetSize / 2**20
+        except (AttributeError, OSError):
+            return None
+
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
@@ -0,0 +1,193 @@
+"""A history of every image that's been shown, kept in a SQLite
+database."""
+
+from queue import Empty, SimpleQueue
+from threading import Thread
+from time import monotonic, time
+import sqlite3
+
+
+class SessionHistory:
+    """Records every image that's shown, when it was shown, how long it
+    was planned to be shown for, how long it was actually shown for, and
+    whether the timer ran out (completed) or the image was skipped.
+
+    Recording only puts the record on a queue. A writer thread inserts
+    the records in batches, so showing an image never waits for the
+    disk. Records older than retention_days are deleted when the
+    history is opened. If the database can't be opened, the history is
+    disabled and nothing is recorded.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            started REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS views (
+            session_id INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            started REAL NOT NULL,
+            planned REAL,
+            duration REAL NOT NULL,
+            completed INTEGER NOT NULL
+        );
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        retention_days: float = 90,
+        batch_size: int = 100,
+        batch_interval: float = 2.0,
+    ) -> None:
+        """
+        Initializes a new SessionHistory object, and starts a session.
+
+        :param file_name: The SQLite database the history is kept in.
+        :param retention_days: The amount of days records are kept for,
+        0 to keep them forever.
+        :param batch_size: The largest amount of records inserted at
+        once.
+        :param batch_interval: The amount of seconds the writer waits to
+        gather records before inserting them.
+        """
+        self.file_name = file_name
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+
+        # the image that's being shown right now, along with when it
+        # started being shown and for how long it's planned to be
+        self.session_id = 0
+        self.current_path = None
+        self.current_started = 0.0
+        self.current_start_time = 0.0
+        self.current_planned = None
+
+        # set by the writer if the database can't be opened, after which
+        # records are dropped instead of piling up in the queue
+        self.disabled = False
+
+        self._records: SimpleQueue = SimpleQueue()
+        self._writer = Thread(target=self._write, daemon=True)
+        self._writer.start()
+        self.start_session()
+
+    def start_session(self) -> None:
+        """Ends the image that's being shown, and starts a new session.
+        Session ids are the time the session started in microseconds, so
+        newer sessions always have bigger ids.
+        """
+        self.end_view(completed=False)
+        self.session_id = max(self.session_id + 1, int(time() * 1_000_000))
+        if self.disabled:
+            return
+        self._records.put(("session", (self.session_id, time())))
+
+    def show(self, path: str, planned: float | None, completed=False) -> None:
+        """Records that a new image is being shown, and ends the image
+        that was being shown before it. Showing the same image again is
+        ignored, unless the timer ran out on it.
+
+        :param path: The path of the image that's being shown.
+        :param planned: The amount of seconds the image is planned to be
+        shown for, None if the timer isn't running.
+        :param completed: Whether the image before it was shown until
+        the timer ran out.
+        """
+        if self.disabled or path == self.current_path and not completed:
+            return
+
+        self.end_view(completed=completed)
+        self.current_path = path
+        self.current_started = monotonic()
+        self.current_start_time = time()
+        self.current_planned = planned
+
+    def end_view(self, completed: bool) -> None:
+        """Records the image that's being shown as no longer shown."""
+        if self.disabled or self.current_path is None:
+            return
+        self._records.put(
+            (
+                "view",
+                (
+                    self.session_id,
+                    self.current_path,
+                    self.current_start_time,
+                    self.current_planned,
+                    monotonic() - self.current_started,
+                    int(completed),
+                ),
+            )
+        )
+        self.current_path = None
+
+    def close(self) -> None:
+        """Ends the image that's being shown, and waits for every record
+        to be written.
+        """
+        self.end_view(completed=False)
+        self._records.put(None)
+        self._writer.join(timeout=5)
+
+    def _write(self) -> None:
+        """Runs on its own thread. Opens the database, deletes the old
+        records, and then inserts the records in batches until close()
+        is called.
+        """
+        try:
+            connection = sqlite3.connect(self.file_name)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self.schema)
+            self._delete_old_records(connection)
+        except sqlite3.Error as e:
+            print(f"SessionHistoryWarning: The history can't be kept: {e}")
+            self.disabled = True
+
+            # drops whatever was recorded before the history was disabled
+            while True:
+                try:
+                    self._records.get_nowait()
+                except Empty:
+                    return
+
+        closing = False
+        while not closing:
+            records = [self._records.get()]
+            deadline = monotonic() + self.batch_interval
+            while records[-1] is not None and len(records) < self.batch_size:
+                try:
+                    records.append(
+                        self._records.get(timeout=max(0.0, deadline - monotonic()))
+                    )
+                except Empty:
+                    break
+
+            if records[-1] is None:
+                closing = True
+                records.pop()
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO sessions VALUES (?, ?)",
+                        [row for kind, row in records if kind == "session"],
+                    )
+                    connection.executemany(
+                        "INSERT INTO views VALUES (?, ?, ?, ?, ?, ?)",
+                        [row for kind, row in records if kind == "view"],
+                    )
+            except sqlite3.Error as e:
+                print(f"SessionHistoryWarning: Could not save the history: {e}")
+
+        connection.close()
+
+    def _delete_old_records(self, connection: sqlite3.Connection) -> None:
+        if not self.retention_days:
+            return
+        oldest_id = int((time() - self.retention_days * 86400) * 1_000_000)
+        with connection:
+            connection.execute("DELETE FROM views WHERE session_id < ?", (oldest_id,))
+            connection.execute("DELETE FROM sessions WHERE id < ?", (oldest_id,))
@@ -0,0 +1,141 @@
+"""The timer that decides how long every image is shown for."""
+
+from math import ceil
+from time import monotonic
+from typing import Any, Callable
+
+from .profiling import Profiler
+
+
+class SessionTimer:
+    """Counts down towards a deadline on the monotonic clock, so that the
+    timer doesn't drift no matter how late its ticks come in. run()
+    ticks at the start of every second through the schedule it's given,
+    and only then, so the timer doesn't wake up in between seconds or
+    while it's stopped.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = monotonic,
+        schedule: Callable[[int, Callable[[], None]], Any] | None = None,
+        cancel: Callable[[Any], None] | None = None,
+        profiler: Profiler | None = None,
+    ) -> None:
+        """
+        Initializes a new SessionTimer object.
+
+        :param clock: Returns the current time in seconds.
+        :param schedule: Schedules a call on the main loop after an
+        amount of milliseconds and returns its job, like the after() of
+        a Tk window. Needed for run().
+        :param cancel: Cancels a job returned by schedule, like the
+        after_cancel() of a Tk window.
+        :param profiler: If given, how late every tick comes in is
+        recorded in it as timer_tick_jitter.
+        """
+        self.clock = clock
+        self.schedule = schedule
+        self.cancel = cancel
+        self.profiler = profiler
+        self.deadline = 0.0
+
+        # the scheduled tick, None while the timer isn't ticking, and
+        # when it's meant to come in on the clock
+        self.tick_job = None
+        self.tick_due = None
+        self._on_tick: Callable[[int], None] = lambda seconds_left: None
+        self._on_reached: Callable[[], None] = lambda: None
+
+        # the deadline the timer just reached, so that the next image's
+        # timer (or the countdown) counts on from it and small delays
+        # don't add up over a session
+        self.carry_over_deadline = None
+
+    def start(self, seconds: int) -> None:
+        """Starts counting down the given amount of seconds."""
+        self.deadline = self.next_deadline(seconds)
+
+    def next_deadline(self, seconds: int) -> float:
+        """Returns the deadline that's the given amount of seconds away,
+        counted from the deadline that was just reached if there is one
+        and it isn't more than a second old.
+        """
+        start = self.clock()
+        if (
+            self.carry_over_deadline is not None
+            and start - self.carry_over_deadline < 1
+        ):
+            start = self.carry_over_deadline
+        self.carry_over_deadline = None
+        return start + seconds
+
+    def reached(self) -> None:
+        """Marks the deadline as reached, so that the next start() counts
+        on from it.
+        """
+        self.carry_over_deadline = self.deadline
+
+    def forget_reached(self) -> None:
+        """Makes the next start() count from the current time, used when
+        the timer is started by hand.
+        """
+        self.carry_over_deadline = None
+
+    def seconds_left(self) -> int:
+        """Returns the whole seconds left until the deadline, rounded up.
+        Ticks that come in slightly early still count as on time.
+        """
+        return max(0, ceil(self.deadline - self.clock() - 0.005))
+
+    def until_next_second(self, seconds_left: int) -> float:
+        """Returns the amount of seconds until the timer goes from
+        seconds_left to the second before it.
+        """
+        return self.deadline - (seconds_left - 1) - self.clock()
+
+    @property
+    def ticking(self) -> bool:
+        return self.tick_job is not None
+
+    def run(
+        self, on_tick: Callable[[int], None], on_reached: Callable[[], None]
+    ) -> None:
+        """Ticks right away and then at the start of every second until
+        the deadline, stopping whatever ticks were scheduled before.
+
+        :param on_tick: Called with the seconds left on every tick, the
+        last time with 0.
+        :param on_reached: Called after the last tick, once the deadline
+        has been marked as reached.
+        """
+        self.stop()
+        self._on_tick = on_tick
+        self._on_reached = on_reached
+        self._tick()
+
+    def stop(self) -> None:
+        """Cancels the scheduled tick, if there is one."""
+        self.tick_due = None
+        if self.tick_job is not None:
+            self.cancel(self.tick_job)
+            self.tick_job = None
+
+    def _tick(self) -> None:
+        self.tick_job = None
+        if self.tick_due is not None and self.profiler is not None:
+            self.profiler.record("timer_tick_jitter", abs(self.clock() - self.tick_due))
+        self.tick_due = None
+
+        seconds_left = self.seconds_left()
+        self._on_tick(seconds_left)
+        if seconds_left > 0:
+            until_next_second = self.until_next_second(seconds_left)
+            self.tick_due = self.clock() + until_next_second
+            self.tick_job = self.schedule(
+                max(1, round(until_next_second * 1000)), self._tick
+            )
+            return
+
+        self.reached()
+        self._on_reached()
@@ -0,0 +1,159 @@
+"""Opt-in recording of what happened during a session, in the order it
+happened, for viewing in a trace viewer.
+"""
+
+from collections import deque
+from contextlib import nullcontext
+from threading import current_thread, get_ident
+from time import perf_counter
+from typing import Any, Callable
+import json
+import os
+
+# returned by EventTrace.span() while tracing is off
+NOT_TRACED = nullcontext()
+
+
+class _Span:
+    """Records a `with` block as a single event with a duration."""
+
+    __slots__ = ("trace", "name", "category", "args", "start")
+
+    def __init__(
+        self, trace: "EventTrace", name: str, category: str, args: dict
+    ) -> None:
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> None:
+        self.start = self.trace.clock()
+
+    def __exit__(self, *_) -> None:
+        self.trace.add(
+            "X",
+            self.name,
+            self.category,
+            self.start,
+            self.trace.clock() - self.start,
+            self.args,
+        )
+
+
+class EventTrace:
+    """A ring buffer of timestamped events that can be exported in the
+    Chrome Trace Event format, to be opened in chrome://tracing or
+    https://ui.perfetto.dev. Only the latest capacity events are kept.
+    Events can be added from any thread. While the trace is disabled
+    nothing is recorded.
+
+    Usage:
+        trace.instant("folder opened", "scan", folders=folders)
+        with trace.span("decode", "image", path=path):
+            image.load()
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        capacity: int = 100_000,
+        clock: Callable[[], float] = perf_counter,
+    ) -> None:
+        self.enabled = enabled
+        self.clock = clock
+        self.started = clock()
+
+        # (phase, name, category, time, duration, thread id, args), a
+        # deque only needs the GIL to be appended to from every thread
+        self._events: deque[tuple] = deque(maxlen=capacity)
+        self._thread_names: dict[int, str] = {}
+
+    @staticmethod
+    def enabled_by_environment(variable: str = "IMAGE_REFERENCES_TRACE") -> bool:
+        """Checks if tracing has been turned on through an environment
+        variable, any value other than empty or 0 turns it on.
+        """
+        return os.environ.get(variable, "") not in ("", "0")
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(
+        self,
+        phase: str,
+        name: str,
+        category: str,
+        time: float,
+        duration: float | None = None,
+        args: dict | None = None,
+    ) -> None:
+        thread_id = get_ident()
+        if thread_id not in self._thread_names:
+            self._thread_names[thread_id] = current_thread().name
+        self._events.append((phase, name, category, time, duration, thread_id, args))
+
+    def instant(self, name: str, category: str, **args: Any) -> None:
+        """Records something that happened at this moment."""
+        if not self.enabled:
+            return
+        self.add("i", name, category, self.clock(), args=args or None)
+
+    def span(self, name: str, category: str, **args: Any) -> "_Span | nullcontext":
+        """Returns a context manager that records its block as an event
+        with a duration.
+        """
+        if not self.enabled:
+            return NOT_TRACED
+        return _Span(self, name, category, args or None)
+
+    def chrome_events(self) -> list[dict]:
+        """Returns the recorded events as Chrome Trace Events, with their
+        times in microseconds since the trace was created.
+        """
+        pid = os.getpid()
+        chrome_events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": thread_name},
+            }
+            for thread_id, thread_name in list(self._thread_names.items())
+        ]
+
+        # copying the deque is done while holding the GIL, so events that
+        # are added from other threads in the meantime don't get in the way
+        events = self._events.copy()
+        for phase, name, category, time, duration, thread_id, args in events:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": phase,
+                "ts": round((time - self.started) * 1_000_000, 1),
+                "pid": pid,
+                "tid": thread_id,
+            }
+            if duration is not None:
+                event["dur"] = round(duration * 1_000_000, 1)
+            if phase == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            chrome_events.append(event)
+        return chrome_events
+
+    def export(self, file_name: str) -> None:
+        """Writes the recorded events into a JSON file, if there are any."""
+        if not self._events:
+            return
+        try:
+            with open(file_name, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"traceEvents": self.chrome_events(), "displayTimeUnit": "ms"},
+                    f,
+                    default=str,
+                )
+        except OSError as e:
+            print(f"TraceWarning: Could not save {file_name}: {e}")
@@ -5,13 +5,33 @@ import customtkinter as ctk
 from tktooltip import ToolTip
 from tkinter import filedialog, messagebox, PhotoImage
 from PIL import Image, ImageTk
+from core import (
+    EventTrace,
+    FolderScanner,
+    ImageCache,
+    ImagePrefetcher,
+    ImageQueue,
+    ImageSession,
+    PathTable,
+    Profiler,
+    ScanIndex,
+    SessionHistory,
+    SessionTimer,
+    fit_image,
+    resident_megabytes,
+)
 from pathlib import Path
 from random import shuffle
-from threading import Timer
-import ast
+from threading import Event, Lock, Thread
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+from time import monotonic, sleep
+import atexit
+import json
 import os, sys
+import re
 import platform
-from typing import Any
+from typing import Any, Callable
 
 
 class App(ctk.CTk):
@@ -24,10 +44,18 @@ class App(ctk.CTk):
         geometry: tuple[int, int] = (600, 500),
         size_changer_sizes: tuple[int, int] = (600, 1000),
         min_height: int = 0,
+        icon_atlas: "IconAtlas | None" = None,
     ) -> None:
         # setup
         super().__init__()
 
+        # every icon of the app is cut out of this atlas
+        self.icon_atlas = (
+            icon_atlas
+            if icon_atlas is not None
+            else IconAtlas(resource_path("app_widget_images/atlas.json"))
+        )
+
         # # button colors
         self.button_theme_color = {
             "normal": ("#EB6864", "#1F6AA5"),
@@ -93,16 +121,75 @@ class App(ctk.CTk):
             "timer_temp": 30,
             "load_timer_temp": True,
             "load_saved_directories": True,
+            # no longer used, kept so older preferences files still load
             "wait_directory_load": 0.0,
+            "scan_index_folder": "scan_index",
+            "prefetch_depth": 3,
+            "image_cache_megabytes": 512,
+            "sample_limited_sessions": True,
+            "record_history": True,
+            "history_file": "history.sqlite3",
+            "history_days": 90,
+            "profiling": False,
+            "profile_file": "profile.json",
+            "performance_overlay": False,
+            "trace": False,
+            "trace_file": "trace.json",
         }
 
+        # records what happens during the session if it's turned on in
+        # the preferences or through the IMAGE_REFERENCES_TRACE
+        # environment variable, and saves it as a Chrome trace on exit
+        # and with Ctrl+Shift+T. Loading the preferences is only traced
+        # if it's turned on through the environment variable.
+        self.trace = EventTrace(enabled=EventTrace.enabled_by_environment())
+
         # # save and load system
         self.save_load_system = SaveLoadSystem(
             file_name="preferences",
             extension=".txt",
             default_values=self.default_preferences,
             mutable_keys=False,
-        )
+            trace=self.trace,
+        )
+        if self.save_load_system.values["trace"]:
+            self.trace.enabled = True
+        if self.trace.enabled:
+            atexit.register(self.export_trace)
+            self.bind("<Control-Shift-KeyPress-T>", lambda _: self.export_trace())
+            self.bind("<Alt-Shift-KeyPress-T>", lambda _: self.export_trace())
+
+        # times every stage of showing an image if it's turned on in the
+        # preferences or through the IMAGE_REFERENCES_PROFILE environment
+        # variable. The timings are saved on exit and with Ctrl+Shift+P.
+        self.profiling = (
+            bool(self.save_load_system.values["profiling"])
+            or Profiler.enabled_by_environment()
+        )
+        self.profiler = Profiler(enabled=self.profiling)
+        if self.profiling:
+            atexit.register(self.dump_profile)
+            self.bind("<Control-Shift-KeyPress-P>", lambda _: self.dump_profile())
+            self.bind("<Alt-Shift-KeyPress-P>", lambda _: self.dump_profile())
+
+        # folder scans that are currently running in the background
+        self.folder_scanners: list[FolderScanner] = []
+
+        # merged images are moved into the queue this many at a time, one
+        # chunk per call from the main loop, so that merging a big folder
+        # doesn't hold up the window
+        self.interleave_chunk_size = 1000
+        self.interleave_job = None
+
+        # the history of every image that's been shown, written to the
+        # disk in the background
+        self.session_history = None
+        if self.save_load_system.values["record_history"]:
+            self.session_history = SessionHistory(
+                file_name=self.save_load_system.values["history_file"],
+                retention_days=float(self.save_load_system.values["history_days"]),
+            )
+            atexit.register(self.session_history.close)
 
         # # widgets (these have to be put after save_load_system)
         self.image_frame = ImageFrame(self)
@@ -119,10 +206,13 @@ class App(ctk.CTk):
         # previously turned off
         if not self.save_load_system.values["load_saved_directories"]:
             self.save_load_system.values["directories"] = []
-            self.save_load_system.save_value(
-                input_value=str(self.save_load_system.values),
-                file_name=self.save_load_system.file_name,
-            )
+            self.save_load_system.save()
+
+        # deletes the scan indexes of folders that aren't saved anymore
+        ScanIndex.prune(
+            index_folder=self.save_load_system.values["scan_index_folder"],
+            folders=self.save_load_system.values["directories"],
+        )
 
         # layout that won't change
         self.everything_else_frame.pack()
@@ -134,16 +224,19 @@ class App(ctk.CTk):
         # sets the app theme to the last used theme
         ctk.set_appearance_mode(self.save_load_system.values["theme"])
 
-        # check if a directory has been saved, and open it
+        # things that aren't needed for the window to be shown are done
+        # once the window has been drawn for the first time
+        self.after_idle(self.after, 0, self.finish_startup)
+
+        # check if a directory has been saved, and open it as soon as the
+        # main loop is running. The folders are scanned in the background
+        # and the images are handed over on the main loop, so nothing has
+        # to wait for the window to be ready.
         if (
             self.save_load_system.values["directories"]
             and self.save_load_system.values["load_saved_directories"]
         ):
-            self.timer = Timer(
-                interval=float(self.save_load_system.values["wait_directory_load"]),
-                function=self.load_saved_dir,
-            )
-            self.timer.start()
+            self.after_idle(self.load_saved_dir)
 
     def set_app_icon(self, windows_icon: str, linux_icon: str, mac_icon: str):
         system = platform.system()
@@ -167,11 +260,29 @@ class App(ctk.CTk):
         except Exception as e:
             print(f"Failed to load icon for {system}: {e}")
 
+    def finish_startup(self) -> None:
+        """Builds the settings menu and starts decoding the countdown
+        images after the window has been shown.
+        """
+        self.timer_frame.load_countdown_images()
+        self.settings_menu.build_menu()
+
+    def dump_profile(self) -> None:
+        """Saves the timings of the profiler into profile_file and prints
+        them.
+        """
+        self.profiler.dump(self.save_load_system.values["profile_file"])
+        print(self.profiler.report_text())
+
+    def export_trace(self) -> None:
+        """Saves the recorded events into trace_file."""
+        self.trace.export(self.save_load_system.values["trace_file"])
+
     def load_saved_dir(self):
-        self.timer = None
-        temp_directories = self.save_load_system.values["directories"]
-        for directory in temp_directories:
-            self.open_folder(predetermined_folder=directory)
+        self.open_folders(
+            folders=list(self.save_load_system.values["directories"]),
+            from_saved_directories=True,
+        )
 
     def create_normal_layout(self):
         self.button_frame.index_label.pack(side="top", fill="x")
@@ -258,106 +369,333 @@ class App(ctk.CTk):
 
     def open_folder(self, reset_queue=False, predetermined_folder=None) -> None:
         """Opens a folder and adds all the images inside including all
-        the sub-folders' images into a directory.
+        the sub-folders' images into a directory. The folder is scanned
+        in the background, and the first image is shown as soon as it
+        is found.
         """
-        try:
-            # close the file menu in settings_menu.
-            self.settings_menu.close_menu()
-
-            # opens a window for the user to open a folder and resets
-            # the current directory if the user chooses to.
-            if reset_queue:
-                self.image_frame.directory_list = []
-                self.save_load_system.values["directories"] = []
-
-            folder = (
-                predetermined_folder
-                if predetermined_folder is not None
-                else (
-                    filedialog.askdirectory(
-                        title="Select A Folder", initialdir="C:/Users/Pictures"
-                    )
+        # close the file menu in settings_menu.
+        self.settings_menu.close_menu()
+
+        # opens a window for the user to open a folder and resets
+        # the current directory if the user chooses to.
+        if reset_queue:
+            self.clear_queue()
+
+        folder = (
+            predetermined_folder
+            if predetermined_folder is not None
+            else (
+                filedialog.askdirectory(
+                    title="Select A Folder", initialdir="C:/Users/Pictures"
                 )
             )
+        )
 
-            # if the user does not cancel the folder selection and the
-            # folder is not empty
-            if folder:
-                # For every single file in that path folder, check its
-                # file extension (make sure to make the file suffix
-                # lowercase beforehand) and if it's a '.png', '.jpg',
-                # or '.jpeg', add it into the directory list.
-                # (Thanks to @fashoomp from the Python discord server)
-                for file in Path(folder).rglob("*.*"):
-                    if file.suffix.lower() in (".png", ".jpg", ".jpeg"):
-                        self.image_frame.directory_list.append(file)
-
-                if self.image_frame.randomize_list_bool.get():
-                    shuffle(self.image_frame.directory_list)
-
-                self.image_frame.image_amount_list = list(
-                    range(0, len(self.image_frame.directory_list))
-                )
-                self.image_frame.image_amount = len(self.image_frame.image_amount_list)
-                self.image_frame.frame_index = self.image_frame.image_amount_list[0]
+        # if the user cancels the folder selection
+        if not folder:
+            self.trace.instant("folder selection cancelled", "scan")
+            return
 
-                # values = root.save_load_system.values
-                if predetermined_folder is None:
-                    self.save_load_system.values["directories"].append(str(folder))
-                    self.save_load_system.save_value(
-                        input_value=str(self.save_load_system.values),
-                        file_name=self.save_load_system.file_name,
-                    )
+        # a sampled queue can't be added onto, so the new folder is
+        # sampled again together with the folders that were already open
+        if self.image_frame.sampled:
+            folders = self.save_load_system.values["directories"] + [folder]
+            self.clear_queue()
+            self.open_folders(folders=folders)
+            return
 
-                # enables every button in button_frame
-                self.button_frame.image_button_state("normal")
+        self.open_folders(
+            folders=[folder], from_saved_directories=predetermined_folder is not None
+        )
 
-                # re-enables the image limit stuff if it was off
-                self.settings_menu.image_limit_state(normal_or_disabled="normal")
+    def clear_queue(self) -> None:
+        """Stops the running folder scans and empties the queue along with
+        the saved directories.
+        """
+        # the scans are forgotten along with the queue, so that they
+        # don't finish into the new one
+        self.cancel_folder_scans()
+        self.folder_scanners = []
+        if self.interleave_job is not None:
+            self.after_cancel(self.interleave_job)
+            self.interleave_job = None
+        self.image_frame.session.clear()
+        self.save_load_system.values["directories"] = []
+
+        # a new queue is a new session in the history
+        if self.session_history is not None:
+            self.session_history.start_session()
+
+    def resample_folders(self) -> None:
+        """Takes a new sample of the opened folders, used when the image
+        limit is raised past the size of a sampled queue.
+        """
+        folders = list(self.save_load_system.values["directories"])
+        self.clear_queue()
+        self.open_folders(folders=folders)
+
+    def open_folders(self, folders: list[str], from_saved_directories=False) -> None:
+        """Scans every folder at the same time and adds all of their
+        images into the queue. The queue is set up, rendered, and saved
+        once for all the folders together instead of once per folder.
+
+        If the queue is empty, randomized, and has an image limit, only
+        a random sample of image_limit images is kept while the folders
+        are scanned, and the session starts as soon as the sample is
+        filled.
+        """
+        sample_size = None
+        if (
+            self.save_load_system.values["sample_limited_sessions"]
+            and self.image_frame.randomize_list_bool.get()
+            and self.image_frame.image_queue.image_limit
+            and not self.image_frame.directory_list
+        ):
+            sample_size = self.image_frame.image_queue.image_limit
+            self.image_frame.sampled = True
+
+        # folders that are added onto a queue that's already going are
+        # merged into the part of the queue that hasn't been shown yet
+        appending = bool(self.image_frame.directory_list)
+
+        scanner = FolderScanner(
+            schedule=self.after,
+            folders=folders,
+            on_batch=lambda scanner, batch: self.add_scanned_images(
+                scanner=scanner,
+                batch=batch,
+                from_saved_directories=from_saved_directories,
+                appending=appending,
+            ),
+            on_done=lambda scanner: self.finish_folder_scan(
+                scanner=scanner,
+                from_saved_directories=from_saved_directories,
+                appending=appending,
+            ),
+            index_folder=self.save_load_system.values["scan_index_folder"],
+            sample_size=sample_size,
+            on_replace=self.replace_sampled_images,
+        )
+        self.folder_scanners.append(scanner)
+        scanner.start()
+        self.trace.instant(
+            "folder opened", "scan", folders=folders, sample_size=sample_size
+        )
+
+        # lets the user know that the folders are being scanned if there
+        # aren't any images to show yet
+        if not self.image_frame.directory_list:
+            self.button_frame.image_order_index.set("Scanning for images...")
+            self.button_frame.index_label.configure(
+                textvariable=self.button_frame.image_order_index
+            )
 
-                # enables the timers and buttons in timer_frame
-                self.timer_frame.time_button_state(
-                    start_state="normal", pause_state="disabled", reset_state="disabled"
-                )
-                self.timer_frame.time_entry_state("normal")
+    def add_scanned_images(
+        self,
+        scanner: "FolderScanner",
+        batch: list[Path],
+        from_saved_directories=False,
+        appending=False,
+    ) -> None:
+        """Adds a batch of images found by a FolderScanner into the
+        queue. The first batch of a scan into an empty queue sets the
+        queue up the same way opening a folder always has, the later
+        batches are only appended. The images of a scan into a queue
+        that's already going are merged into the images that haven't
+        been shown yet, without moving any of the other images.
+        """
+        self.trace.instant("scan batch", "scan", images=len(batch), found=scanner.found)
+        if self.image_frame.directory_list and (appending or scanner.batches == 1):
+            self.merge_scanned_images(batch)
+            return
 
-                # enables the reset queue button
-                self.settings_menu.switch_folder_button.configure(
-                    state="normal", fg_color=self.button_theme_color["normal"]
-                )
+        # the images of a sample are kept in the order they were picked
+        # in, since the reservoir refers to them by their index
+        if self.image_frame.randomize_list_bool.get() and scanner.sample_size is None:
+            shuffle(batch)
 
-                # binds the shortcut buttons
-                self.bind(
-                    "<Alt-Shift-KeyPress-O>",
-                    lambda _: self.open_folder(reset_queue=True),
-                )
-                self.bind(
-                    "<Control-Shift-KeyPress-O>",
-                    lambda _: self.open_folder(reset_queue=True),
-                )
+        # later batches only extend the queue
+        if scanner.batches > 1:
+            self.image_frame.session.add(batch)
+            self.button_frame.update_index_label()
+            return
 
-                # updating image and label in button_frame
-                self.button_frame.update_image_original()
+        self.image_frame.session.add(
+            batch, reshuffle=self.image_frame.randomize_list_bool.get()
+        )
+        self.image_frame.session.jump(to_first=True)
 
-                # saves the image limit that's been set before updating
-                # the label
-                self.image_frame.save_image_limit()
-                self.button_frame.update_index_label()
+        # enables every button in button_frame
+        self.button_frame.image_button_state("normal")
 
-                if self.timer_frame.opened_folder:
-                    self.timer_frame.currently_counting_down = False
-                    if predetermined_folder is None:
-                        self.timer_frame.reset_time(from_folder_open=True)
-                    self.timer_frame.resetted = False
-                    self.timer_frame.countdown_needed = True
-                self.timer_frame.opened_folder = True
+        # re-enables the image limit stuff if it was off
+        self.settings_menu.image_limit_state(normal_or_disabled="normal")
 
-        except IndexError:
-            print(
-                "OpenFolderWarning: Folder selection cancelled, "
-                "the directory was invalid, or there were no images in the "
-                "folder."
+        # enables the timers and buttons in timer_frame
+        self.timer_frame.time_button_state(
+            start_state="normal", pause_state="disabled", reset_state="disabled"
+        )
+        self.timer_frame.time_entry_state("normal")
+
+        # enables the reset queue button
+        self.settings_menu.set_switch_folder_state(normal_or_disabled="normal")
+
+        # binds the shortcut buttons
+        self.bind(
+            "<Alt-Shift-KeyPress-O>",
+            lambda _: self.open_folder(reset_queue=True),
+        )
+        self.bind(
+            "<Control-Shift-KeyPress-O>",
+            lambda _: self.open_folder(reset_queue=True),
+        )
+
+        # updating image and label in button_frame
+        self.button_frame.update_image_original()
+        self.profiler.record("scan_first_image", monotonic() - scanner.started_at)
+
+        # applies the image limit that's been set before updating the
+        # label, the preferences are saved once the scan is finished
+        self.image_frame.save_image_limit(save_preferences=False)
+        self.button_frame.update_index_label()
+
+        if self.timer_frame.opened_folder:
+            self.timer_frame.currently_counting_down = False
+            if not from_saved_directories:
+                self.timer_frame.reset_time()
+        self.timer_frame.opened_folder = True
+
+    def merge_scanned_images(self, batch: list[Path]) -> None:
+        """Appends a batch of images to the queue and, if the queue is
+        randomized, moves every new image to a random place after the
+        current image. Only the new images are touched, so the current
+        image and the images before it stay where they are.
+        """
+        randomize = self.image_frame.randomize_list_bool.get()
+        self.image_frame.session.merge(batch, randomize=randomize)
+        if randomize and self.interleave_job is None:
+            self.interleave_merged_images()
+
+        self.button_frame.update_index_label()
+
+    def interleave_merged_images(self) -> None:
+        """Moves a chunk of the merged images to random places after the
+        current image, and schedules the next chunk if there are more.
+        """
+        self.interleave_job = None
+        with self.profiler.stage("interleave"):
+            more = self.image_frame.session.interleave_merged(
+                limit=self.interleave_chunk_size
             )
+        if more:
+            self.interleave_job = self.after(1, self.interleave_merged_images)
+        self.image_frame.prefetch_neighbours()
+
+    def replace_sampled_images(
+        self, scanner: "FolderScanner", replacements: list[tuple[int, Path]]
+    ) -> None:
+        """Swaps images of a sampled queue for the ones the reservoir of
+        a FolderScanner picked instead. Images that have already been
+        shown keep their place, so the images that are left in the
+        queue are still drawn from every image that's been found.
+        """
+        if not self.image_frame.directory_list:
+            return
+
+        if self.image_frame.session.replace(replacements):
+            self.image_frame.prefetch_neighbours()
+        self.button_frame.update_index_label()
+
+    def finish_folder_scan(
+        self, scanner: "FolderScanner", from_saved_directories=False, appending=False
+    ) -> None:
+        """Cleans up after a FolderScanner is done or cancelled."""
+        # the scan belonged to a queue that has been cleared since
+        if scanner not in self.folder_scanners:
+            return
+        self.folder_scanners.remove(scanner)
+        if not scanner.cancelled:
+            self.profiler.record("scan", monotonic() - scanner.started_at)
+        self.trace.instant(
+            "scan done", "scan", found=scanner.found, cancelled=scanner.cancelled
+        )
+
+        # the folders were invalid, the scan was cancelled, or there were
+        # no images in them
+        if not scanner.found:
+            return
+
+        # a sample that fit every image, or that was cancelled before it
+        # was filled, is the same as no sample
+        if scanner.sample_size is not None and (
+            scanner.found <= scanner.sample_size
+            or self.image_frame.image_queue.image_amount < scanner.sample_size
+        ):
+            self.image_frame.sampled = False
+
+        # remembers the newly opened folders that had images in them
+        if not from_saved_directories:
+            for folder in scanner.folders:
+                if scanner.found_in[folder]:
+                    self.save_load_system.values["directories"].append(str(folder))
+
+        # the images that came in after the first batch were only
+        # shuffled within their own batch, so the unplayed part of the
+        # queue is shuffled once more now that the scan is complete.
+        # Merged images have already been put in random places.
+        if (
+            self.image_frame.randomize_list_bool.get()
+            and not appending
+            and scanner.found > scanner.first_batch_size
+        ):
+            self.image_frame.session.reshuffle_unplayed()
+            self.image_frame.prefetch_neighbours()
+
+        # the image limit may depend on the total amount of images,
+        # this also saves the preferences
+        self.image_frame.save_image_limit()
+        self.button_frame.update_index_label()
+
+    def cancel_folder_scans(self) -> None:
+        """Stops every folder scan that's currently running. The images
+        that have already been found stay in the queue.
+        """
+        for scanner in self.folder_scanners:
+            scanner.cancel()
+
+    def record_image_view(self, completed=False) -> None:
+        """Records the image that's being shown in the session history.
+
+        :param completed: Whether the image before it was shown until
+        the timer ran out.
+        """
+        if self.session_history is None or not self.image_frame.image_queue:
+            return
+
+        planned = None
+        if (
+            completed
+            or self.timer_frame.session_timer.ticking
+            or self.timer_frame.paused
+        ):
+            planned = self.timer_frame.save_temp
+
+        self.session_history.show(
+            path=str(self.image_frame.image_path(self.image_frame.frame_index)),
+            planned=planned,
+            completed=completed,
+        )
+
+    def scan_progress(self) -> str:
+        """Returns the text that tells the user how many images the
+        running folder scans have found so far.
+        """
+        if not self.folder_scanners:
+            return ""
+        found = sum(scanner.found for scanner in self.folder_scanners)
+        if any(scanner.sample_size is not None for scanner in self.folder_scanners):
+            return f" (Sampling, {found} found)"
+        return f" (Scanning, {found} found)"
 
 
 class ImageFrame(ctk.CTkFrame):
@@ -376,17 +714,7 @@ class ImageFrame(ctk.CTkFrame):
             bg_color="transparent",
         )
 
-        # needed variables for storing image files, the current image
-        # index, and the image limit.
-        self.frame_index = 0
         self.values = self.parent.save_load_system.values
-        self.directory_list = []
-        self.image_amount_list = (
-            list(range(0, len(self.directory_list)))
-            if list(range(0, len(self.directory_list)))
-            else []
-        )
-        self.image_amount = len(self.image_amount_list)
         self.randomize_list_bool = ctk.BooleanVar(value=self.values["randomize"])
         self.image_limit_display = (
             self.values["image_limit"]
@@ -401,23 +729,57 @@ class ImageFrame(ctk.CTkFrame):
             )
         )
 
-        # tells the image changer classes if it should decide the image
-        # limit change based off of the image amount list or the image
-        # limit that's been set.
-        self.reachable_images = (
-            self.image_amount_list
-            if self.image_limit_display == "Unlimited"
-            else list(range(0, int(self.image_limit_display)))
+        # the images of the opened folders, the order they're shown in,
+        # which of them can be reached with the image limit that's been
+        # set, and the current image (see the properties below)
+        self.session = ImageSession(
+            image_limit=(
+                int(self.image_limit_display)
+                if self.image_limit_display not in ("Unlimited", 0)
+                else None
+            ),
         )
 
         # image setup
         self.image_original = Image.open(
             resource_path("other_essentials/empty_placeholder.png")
         )
+
+        # shown in place of images that can't be opened
+        self.placeholder_image = self.image_original
         self.image_ratio = self.image_original.size[0] / self.image_original.size[1]
         self.image_tk = ImageTk.PhotoImage(self.image_original)
         self.resized_tk = None
 
+        # the cache key of image_original, None if it's not an image
+        # from the queue
+        self.image_key = None
+        self.image_cache = ImageCache(
+            max_bytes=int(self.values["image_cache_megabytes"]) * 1024 * 1024,
+            profiler=self.parent.profiler,
+            trace=self.parent.trace,
+        )
+        self.image_prefetcher = ImagePrefetcher(image_cache=self.image_cache)
+
+        # resizing the window shows a quick preview of the image first,
+        # and the proper resize is only done once the window stops
+        # changing size for resize_settle_delay milliseconds
+        self.resize_settle_delay = 150
+        self.resize_preview_delay = 16
+        self.resize_size = None
+        self.resize_job = None
+        self.resize_preview_job = None
+
+        # the image that's currently shown, used for the resize previews
+        self.displayed_image = None
+
+        # the last few shown images, (image_key, size) -> (PhotoImage,
+        # resized image), so that going back to a size costs nothing.
+        # This also holds the countdown images and the next image while
+        # the countdown is going.
+        self.photo_images: OrderedDict[tuple, tuple] = OrderedDict()
+        self.photo_image_limit = 8
+
         # frame to centralize image displayer
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
@@ -431,56 +793,355 @@ class ImageFrame(ctk.CTkFrame):
             relief="ridge",
             bg=self.image_displayer_colors[ctk.get_appearance_mode()],
         )
-        self.image_displayer.create_image(0, 0, anchor="nw", image=self.image_tk)
+        # the only image item on the canvas, it's moved and given a new
+        # image every time the image is shown instead of being recreated
+        self.image_item = self.image_displayer.create_image(
+            0, 0, anchor="nw", image=self.image_tk
+        )
         self.image_displayer.bind(
             "<Configure>",
-            lambda event: self.show_full_image(
-                width=int(event.width),
-                height=int(event.height),
-                turn_off_settings_menu=True,
+            lambda event: self.schedule_resize(
+                width=int(event.width), height=int(event.height)
             ),
         )
 
+        # the performance overlay drawn in the corner of the image
+        # displayer, it's redrawn every performance_overlay_interval
+        # milliseconds while it's shown
+        self.performance_overlay_items = None
+        self.performance_overlay_job = None
+        self.performance_overlay_interval = 500
+        self.performance_overlay_due = None
+        self.parent.bind(
+            "<Control-Shift-KeyPress-D>", lambda _: self.toggle_performance_overlay()
+        )
+        self.parent.bind(
+            "<Alt-Shift-KeyPress-D>", lambda _: self.toggle_performance_overlay()
+        )
+        if self.values["performance_overlay"]:
+            self.show_performance_overlay()
+
         # widgets layout
         self.image_displayer.pack(expand=True, fill="both", side="right")
 
         self.pack_propagate(flag=False)
 
+    @property
+    def frame_index(self) -> int:
+        return self.session.position
+
+    @frame_index.setter
+    def frame_index(self, position: int) -> None:
+        self.session.position = position
+
+    @property
+    def directory_list(self) -> PathTable:
+        return self.session.paths
+
+    @property
+    def image_queue(self) -> ImageQueue:
+        return self.session.queue
+
+    @property
+    def sampled(self) -> bool:
+        return self.session.sampled
+
+    @sampled.setter
+    def sampled(self, sampled: bool) -> None:
+        self.session.sampled = sampled
+
+    def schedule_resize(self, width: int, height: int) -> None:
+        """Coalesces the <Configure> events of the image displayer. A
+        quick preview is shown at most once every resize_preview_delay
+        milliseconds while the window is being resized, and the image is
+        properly resized once the size settles.
+        """
+        # shuts off the settings menu if it's popped up
+        self.parent.settings_menu.close_menu()
+
+        self.resize_size = (width, height)
+        if self.resize_preview_job is None:
+            self.resize_preview_job = self.after(
+                self.resize_preview_delay, self._show_resize_preview
+            )
+
+        if self.resize_job is not None:
+            self.after_cancel(self.resize_job)
+        self.resize_job = self.after(self.resize_settle_delay, self._finish_resize)
+
+    def _show_resize_preview(self) -> None:
+        self.resize_preview_job = None
+        if self.resize_job is not None:
+            self.show_full_image(*self.resize_size, preview=True)
+
+    def _finish_resize(self) -> None:
+        self.resize_job = None
+        self.show_full_image(*self.resize_size)
+
     def show_full_image(
-        self, width: int, height: int, turn_off_settings_menu=False
+        self, width: int, height: int, turn_off_settings_menu=False, preview=False
     ) -> None:
-        """Updates the image in the image displayer."""
+        """Updates the image in the image displayer. A preview is a
+        quick, lower quality resize of the image that's already shown.
+        """
         # shuts off the settings menu if it's popped up
         if turn_off_settings_menu:
             self.parent.settings_menu.close_menu()
 
-        # current ratio
-        canvas_ratio = width / height
+        image_width, image_height, to_canvas_middle, to_canvas_middle_height = (
+            fit_image(width=width, height=height, image_ratio=self.image_ratio)
+        )
+        image_size = (image_width, image_height)
+
+        if preview:
+            preview_source = (
+                self.displayed_image
+                if self.displayed_image is not None
+                else self.image_original
+            )
+            with self.parent.profiler.stage("preview_resize"):
+                preview_image = preview_source.resize(
+                    image_size, Image.Resampling.NEAREST
+                )
+            with self.parent.profiler.stage("photo_image"):
+                self.resized_tk = ImageTk.PhotoImage(preview_image)
+
+        elif (self.image_key, image_size) in self.photo_images:
+            self.photo_images.move_to_end((self.image_key, image_size))
+            self.resized_tk, self.displayed_image = self.photo_images[
+                (self.image_key, image_size)
+            ]
+
+        else:
+            if self.image_key is not None:
+                # decodes the image again at a bigger size if the window
+                # got bigger than what it was decoded for
+                if self.image_cache.too_small(self.image_original, (width, height)):
+                    try:
+                        _, self.image_original = self.image_cache.original(
+                            path=self.image_key[0], canvas_size=(width, height)
+                        )
+                    except Exception as e:
+                        # the smaller image that's already decoded is
+                        # stretched instead
+                        print(f"ImageLoadWarning: Could not decode it again: {e}")
+            self.resized_tk, self.displayed_image = self.make_photo_image(
+                image_key=self.image_key, image=self.image_original, size=image_size
+            )
+
+        with self.parent.profiler.stage("canvas_update"):
+            self.image_displayer.coords(
+                self.image_item,
+                int(image_width / 2 + to_canvas_middle),
+                int(image_height / 2 + to_canvas_middle_height),
+            )
+            # the previous PhotoImage is released here unless it's kept
+            # in self.photo_images
+            self.image_displayer.itemconfigure(
+                self.image_item, anchor="center", image=self.resized_tk
+            )
+
+    def make_photo_image(
+        self, image_key: tuple[str, int] | None, image: Image.Image, size: tuple
+    ) -> tuple[ImageTk.PhotoImage, Image.Image]:
+        """Resizes an image and turns it into a PhotoImage. The result is
+        kept in self.photo_images if the image has a key.
+        """
+        if image_key is None:
+            with self.parent.profiler.stage("resize"):
+                resized_image = image.resize(size)
+            with self.parent.profiler.stage("photo_image"):
+                return ImageTk.PhotoImage(resized_image), resized_image
+
+        resized_image = self.image_cache.rendition(
+            key=image_key, image=image, size=size
+        )
+        with self.parent.profiler.stage("photo_image"):
+            self.photo_images[(image_key, size)] = (
+                ImageTk.PhotoImage(resized_image),
+                resized_image,
+            )
+        if len(self.photo_images) > self.photo_image_limit:
+            self.photo_images.popitem(last=False)
+        return self.photo_images[(image_key, size)]
+
+    def prepare_photo_image(
+        self, image_key: tuple[str, int], image: Image.Image, width: int, height: int
+    ) -> None:
+        """Makes the PhotoImage of an image for the given canvas size
+        ahead of time, so that show_full_image only has to swap it in.
+        """
+        image_width, image_height, _, _ = fit_image(
+            width=width, height=height, image_ratio=image.size[0] / image.size[1]
+        )
+        if (image_key, (image_width, image_height)) in self.photo_images:
+            self.photo_images.move_to_end((image_key, (image_width, image_height)))
+            return
+        self.make_photo_image(
+            image_key=image_key, image=image, size=(image_width, image_height)
+        )
+
+    def next_index(self) -> int | None:
+        """Returns the index of the image the timer goes to next, or None
+        if the queue ends here.
+        """
+        return self.session.next_position(
+            loop=self.parent.button_frame.loop_or_not.get()
+        )
+
+    def prepare_next_image(self) -> None:
+        """Decodes the next image (if the prefetcher hasn't already) and
+        makes its PhotoImage for the current canvas size.
+        """
+        next_index = self.next_index()
+        if next_index is None or next_index >= len(self.directory_list):
+            return
+
+        canvas_size = (
+            self.image_displayer.winfo_width(),
+            self.image_displayer.winfo_height(),
+        )
+        try:
+            image_key, image = self.image_prefetcher.get(
+                path=resource_path(self.image_path(next_index)),
+                canvas_size=canvas_size,
+            )
+        except Exception as e:
+            # the image is opened again (and shown as the placeholder if
+            # it still can't be) once the countdown is over
+            print(f"PrefetchWarning: Could not prepare the next image: {e}")
+            return
+        self.prepare_photo_image(
+            image_key=image_key,
+            image=image,
+            width=canvas_size[0],
+            height=canvas_size[1],
+        )
+
+    def image_path(self, position: int) -> Path:
+        """Returns the path of the image at a position in the queue."""
+        return self.session.path(position)
+
+    def neighbour_indexes(self, depth: int) -> list[int]:
+        """Returns the indexes of the images that can be reached from the
+        current image within `depth` steps forwards or backwards, the
+        nearest ones first. Goes around the queue if loop is on.
+        """
+        return self.session.neighbour_positions(
+            depth=depth, loop=self.parent.button_frame.loop_or_not.get()
+        )
+
+    def prefetch_neighbours(self) -> None:
+        """Starts decoding the images around the current image in the
+        background so that changing images doesn't have to wait for it.
+        """
+        self.image_prefetcher.prefetch(
+            paths=[
+                resource_path(self.image_path(index))
+                for index in self.neighbour_indexes(int(self.values["prefetch_depth"]))
+            ],
+            canvas_size=(
+                self.image_displayer.winfo_width(),
+                self.image_displayer.winfo_height(),
+            ),
+        )
 
-        # declare the alignment variables and set them as 0 by default.
-        to_canvas_middle = 0
-        to_canvas_middle_height = 0
+    def toggle_performance_overlay(self) -> None:
+        """Shows or hides the performance overlay and saves the choice."""
+        if self.performance_overlay_items is None:
+            self.show_performance_overlay()
+        else:
+            self.hide_performance_overlay()
 
-        # get coordinates
-        if canvas_ratio > self.image_ratio:
-            # If canvas is wider than image
-            image_width = int(height * self.image_ratio)
-            image_height = int(height)
-            to_canvas_middle = int((width - image_width) / 2)
+        self.values["performance_overlay"] = self.performance_overlay_items is not None
+        self.parent.save_load_system.save()
 
-        else:  # if canvas is narrower than the image
-            image_width = int(width)
-            image_height = int(width / self.image_ratio)
-            to_canvas_middle_height = int((height - image_height) / 2)
+    def show_performance_overlay(self) -> None:
+        """Draws the performance overlay over the image. The profiler is
+        turned on while the overlay is shown, since that's where most of
+        the overlay's numbers come from.
+        """
+        if self.performance_overlay_items is not None:
+            return
 
-        self.resized_tk = ImageTk.PhotoImage(
-            self.image_original.resize((image_width, image_height))
+        self.parent.profiler.enabled = True
+        background = self.image_displayer.create_rectangle(
+            0, 0, 0, 0, fill="#000000", outline=""
+        )
+        text = self.image_displayer.create_text(
+            8, 8, anchor="nw", fill="#FFFFFF", font=("Courier", 10)
         )
-        self.image_displayer.create_image(
-            int(image_width / 2 + to_canvas_middle),
-            int(image_height / 2 + to_canvas_middle_height),
-            anchor="center",
-            image=self.resized_tk,
+        self.performance_overlay_items = (background, text)
+        self.performance_overlay_due = None
+        self.update_performance_overlay()
+
+    def hide_performance_overlay(self) -> None:
+        if self.performance_overlay_items is None:
+            return
+
+        if self.performance_overlay_job is not None:
+            self.after_cancel(self.performance_overlay_job)
+            self.performance_overlay_job = None
+        self.image_displayer.delete(*self.performance_overlay_items)
+        self.performance_overlay_items = None
+
+        # profiling stays on if it was turned on in the preferences
+        self.parent.profiler.enabled = self.parent.profiling
+
+    def update_performance_overlay(self) -> None:
+        """Redraws the numbers of the performance overlay and schedules
+        the next redraw. How late the redraw comes in shows how busy the
+        main loop is.
+        """
+        self.performance_overlay_job = None
+        profiler = self.parent.profiler
+        if self.performance_overlay_due is not None:
+            profiler.record(
+                "main_loop_lag",
+                max(0.0, profiler.clock() - self.performance_overlay_due),
+            )
+
+        def milliseconds(stage: str) -> str:
+            last = profiler.last(stage)
+            if last is None:
+                return "-"
+            return f"{last:.1f} ms (p99 {profiler.percentile(stage, 99):.1f})"
+
+        cache_stats = self.image_cache.stats()
+        prefetch_stats = self.image_prefetcher.stats()
+        resident = resident_megabytes()
+        queue_size = (
+            f"{self.frame_index + 1}/{len(self.image_queue)} "
+            f"({len(self.directory_list)} found)"
+            if self.directory_list
+            else "empty"
+        )
+        lines = [
+            f"file open  {milliseconds('file_open')}",
+            f"decode     {milliseconds('decode')}",
+            f"resize     {milliseconds('resize')}",
+            f"photo      {milliseconds('photo_image')}",
+            f"change     {milliseconds('image_change')}",
+            f"cache hits {cache_stats['hit_rate']:.0%} "
+            f"({cache_stats['used_bytes'] / 2**20:.0f} MB)",
+            f"prefetch   depth {self.values['prefetch_depth']}, "
+            f"{prefetch_stats['ready']}/{prefetch_stats['prefetched']} ready",
+            f"queue      {queue_size}",
+            f"memory     {'-' if resident is None else f'{resident:.0f} MB'}",
+            f"tick late  {milliseconds('timer_tick_jitter')}",
+            f"loop lag   {milliseconds('main_loop_lag')}",
+        ]
+
+        background, text = self.performance_overlay_items
+        self.image_displayer.itemconfigure(text, text="\n".join(lines))
+        x1, y1, x2, y2 = self.image_displayer.bbox(text)
+        self.image_displayer.coords(background, x1 - 4, y1 - 4, x2 + 4, y2 + 4)
+
+        self.performance_overlay_due = (
+            profiler.clock() + self.performance_overlay_interval / 1000
+        )
+        self.performance_overlay_job = self.after(
+            self.performance_overlay_interval, self.update_performance_overlay
         )
 
     def randomize_or_not(self) -> None:
@@ -493,64 +1154,55 @@ class ImageFrame(ctk.CTkFrame):
             self.randomize_list_bool.set(False)
 
         self.values["randomize"] = self.randomize_list_bool.get()
-        self.parent.save_load_system.save_value(
-            input_value=str(self.values),
-            file_name=self.parent.save_load_system.file_name,
-        )
+        self.parent.save_load_system.save()
 
-    def save_image_limit(self) -> None:
+    def save_image_limit(self, save_preferences=True) -> None:
         try:
             image_limit = (
-                int(self.parent.settings_menu.image_limit_entry.get())
-                if (self.parent.settings_menu.image_limit_entry.get() != "Unlimited")
+                int(self.image_limit_entry_var.get())
+                if (self.image_limit_entry_var.get() != "Unlimited")
                 else 0
             )
-            if self.image_amount_list:
+            # a limit that's at least the amount of images is the same as
+            # no limit, unless folders are still being scanned and the
+            # amount of images isn't known yet, or the images are only a
+            # sample of the opened folders
+            if (
+                self.image_queue.image_amount
+                and not self.parent.folder_scanners
+                and not self.sampled
+            ):
                 self.image_limit_display = (
                     "Unlimited"
-                    if (0 >= image_limit or image_limit >= self.image_amount)
-                    else str(image_limit)
+                    if (
+                        0 >= image_limit or image_limit >= self.image_queue.image_amount
+                    )
+                    else image_limit
                 )
             else:
                 self.image_limit_display = (
-                    "Unlimited" if 0 >= image_limit else str(image_limit)
+                    "Unlimited" if 0 >= image_limit else image_limit
                 )
 
-            # Sets image_limit_display to a max num of 15mil so that the
-            # program doesn't lag itself to death when it tries to
-            # process a large number.
-            self.image_limit_display = min(int(self.image_limit_display), 15_000_000)
-
         except ValueError:
             self.image_limit_display = "Unlimited"
 
-        try:
-            self.reachable_images = (
-                self.image_amount_list
-                if self.image_limit_display == "Unlimited"
-                else list(range(0, int(self.image_limit_display)))
-            )
-        except MemoryError or OverflowError:
-            self.reachable_images = self.image_amount_list
-
-        # set up what the image limit entry says by deleting everything
-        # there first then replacing it with what it needs to show
-        self.parent.settings_menu.image_limit_entry.delete(
-            first_index=0,
-            last_index=len(self.parent.settings_menu.image_limit_entry.get()),
-        )
-        self.parent.settings_menu.image_limit_entry.insert(
-            index=0, string=self.image_limit_display
+        self.image_queue.image_limit = (
+            None
+            if self.image_limit_display == "Unlimited"
+            else self.image_limit_display
         )
 
+        # set up what the image limit entry says through its variable, so
+        # that it works before the settings menu has been built
+        self.image_limit_entry_var.set(str(self.image_limit_display))
+
         # If a folder has been selected, update the image that's being
         # shown + resets the queue if the image limit is less than the
         # current frame index
-        if self.image_amount_list:
-            if self.image_limit_display != "Unlimited" and self.frame_index >= int(
-                self.image_limit_display
-            ):
-                self.frame_index = self.image_amount_list[0]
+        if self.image_queue.image_amount:
+            if self.frame_index not in self.image_queue:
+                self.frame_index = self.image_queue.first
                 self.parent.timer_frame.reset_time()
 
                 # update the image in self
@@ -560,10 +1212,20 @@ class ImageFrame(ctk.CTkFrame):
             self.parent.button_frame.update_index_label()
 
         self.values["image_limit"] = self.image_limit_display
-        self.parent.save_load_system.save_value(
-            input_value=str(self.values),
-            file_name=self.parent.save_load_system.file_name,
-        )
+        if save_preferences:
+            self.parent.save_load_system.save()
+
+        # a sampled queue only holds as many images as the limit it was
+        # sampled with, so a bigger limit needs a new sample
+        if (
+            self.sampled
+            and not self.parent.folder_scanners
+            and (
+                self.image_queue.image_limit is None
+                or self.image_queue.image_limit > self.image_queue.image_amount
+            )
+        ):
+            self.parent.resample_folders()
 
 
 class TimerFrame(ctk.CTkFrame):
@@ -625,6 +1287,10 @@ class TimerFrame(ctk.CTkFrame):
             },
         }
 
+        # the countdown images for both themes, decoded once in the
+        # background after the window has been shown
+        self.countdown_images: dict[str, dict[int, Future]] = {}
+
         # color dictionaries
         # # colors used for the timer entries' text.
         self.entry_color_dict = {
@@ -652,65 +1318,67 @@ class TimerFrame(ctk.CTkFrame):
 
         # shortcut binds for the start, pause, and reset buttons.
         self.start_bind_dictionary = {
-            "normal": "root.timer_frame.start_time(start_button_not=True, "
-            "turn_off_settings_menu=True)",
-            "readonly": 'print("Start Button Shortcut currently disabled.")',
-            "disabled": 'print("Start Button Shortcut currently disabled.")',
+            "normal": lambda _: self.start_time(
+                start_button_not=True, turn_off_settings_menu=True
+            ),
+            "readonly": lambda _: print("Start Button Shortcut currently disabled."),
+            "disabled": lambda _: print("Start Button Shortcut currently disabled."),
         }
 
         self.pause_bind_dictionary = {
-            "normal": "root.timer_frame.pause_time()",
-            "readonly": 'print("Pause Button Shortcut currently disabled.")',
-            "disabled": 'print("Pause Button Shortcut currently disabled.")',
+            "normal": lambda _: self.pause_time(),
+            "readonly": lambda _: print("Pause Button Shortcut currently disabled."),
+            "disabled": lambda _: print("Pause Button Shortcut currently disabled."),
         }
 
         self.reset_bind_dictionary = {
-            "normal": "root.timer_frame.reset_time(" "turn_off_settings_menu=True)",
-            "readonly": 'print("Reset Button Shortcut currently disabled.")',
-            "disabled": 'print("Reset Button Shortcut currently disabled.")',
+            "normal": lambda _: self.reset_time(turn_off_settings_menu=True),
+            "readonly": lambda _: print("Reset Button Shortcut currently disabled."),
+            "disabled": lambda _: print("Reset Button Shortcut currently disabled."),
         }
 
         # image for time buttons
         self.start_time_image = ctk.CTkImage(
-            light_image=Image.open(
-                resource_path("app_widget_images/time_buttons/start_button.png")
+            light_image=self.root.icon_atlas.icon(
+                "app_widget_images/time_buttons/start_button.png"
             ),
-            dark_image=Image.open(
-                resource_path("app_widget_images/time_buttons/start_button.png")
+            dark_image=self.root.icon_atlas.icon(
+                "app_widget_images/time_buttons/start_button.png"
             ),
         )
         self.pause_start_time_image = ctk.CTkImage(
-            light_image=Image.open(
-                resource_path("app_widget_images/time_buttons/pause_button.png")
+            light_image=self.root.icon_atlas.icon(
+                "app_widget_images/time_buttons/pause_button.png"
             ),
-            dark_image=Image.open(
-                resource_path("app_widget_images/time_buttons/pause_button.png")
+            dark_image=self.root.icon_atlas.icon(
+                "app_widget_images/time_buttons/pause_button.png"
             ),
         )
         self.stop_reset_time_image = ctk.CTkImage(
-            light_image=Image.open(
-                resource_path(
-                    "app_widget_images/time_buttons/stop_and_reset_button.png"
-                )
+            light_image=self.root.icon_atlas.icon(
+                "app_widget_images/time_buttons/stop_and_reset_button.png"
             ),
-            dark_image=Image.open(
-                resource_path(
-                    "app_widget_images/time_buttons/stop_and_reset_button.png"
-                )
+            dark_image=self.root.icon_atlas.icon(
+                "app_widget_images/time_buttons/stop_and_reset_button.png"
             ),
         )
 
         # declare the booleans and variables needed
         self.opened_folder = False
         self.paused = False
-        self.resetted = False
         self.heads_up = ctk.BooleanVar(value=self.values["countdown"])
         self.next_image = bool
-        self.countdown_needed = True
-        self.time_start = False
-        self.timer = None
         self.currently_counting_down = False
-        self.from_open_folder = False
+
+        # the timer is driven by Tk's after() instead of a loop, and the
+        # session timer counts towards a deadline so that it doesn't
+        # drift. It only ticks while the timer (or the countdown) runs.
+        self.session_timer = SessionTimer(
+            schedule=self.root.after,
+            cancel=self.root.after_cancel,
+            profiler=self.root.profiler,
+        )
+        self.shown_countdown = None
         self.folder_complete_bool = ctk.BooleanVar(
             value=self.values["alert_queue_complete"]
         )
@@ -875,18 +1543,9 @@ class TimerFrame(ctk.CTkFrame):
         self.reset_button.configure(fg_color=self.root.button_theme_color[reset_state])
 
         # setting the button shortcuts
-        exec(
-            f"self.root.bind('<Control-KeyPress-s>', "
-            f"lambda _: {self.start_bind_dictionary[start_state]})"
-        )
-        exec(
-            f"self.root.bind('<space>', "
-            f"lambda _: {self.pause_bind_dictionary[pause_state]})"
-        )
-        exec(
-            f"self.root.bind('<Control-KeyPress-r>', "
-            f"lambda _: {self.reset_bind_dictionary[reset_state]})"
-        )
+        self.root.bind("<Control-KeyPress-s>", self.start_bind_dictionary[start_state])
+        self.root.bind("<space>", self.pause_bind_dictionary[pause_state])
+        self.root.bind("<Control-KeyPress-r>", self.reset_bind_dictionary[reset_state])
 
     def time_entry_state(self, normal_or_readonly_or_disabled: str) -> None:
         # setting the time entry states
@@ -950,10 +1609,7 @@ class TimerFrame(ctk.CTkFrame):
                         + int(self.second.get())
                     )
                 self.values["timer_temp"] = self.save_temp
-                self.root.save_load_system.save_value(
-                    input_value=str(self.values),
-                    file_name=self.root.save_load_system.file_name,
-                )
+                self.root.save_load_system.save()
 
             if (
                 int(self.hour.get()) * 3600
@@ -975,73 +1631,11 @@ class TimerFrame(ctk.CTkFrame):
             self.time_button_state(
                 start_state="disabled", pause_state="normal", reset_state="normal"
             )
-            while self.temp >= 0 and not self.paused:
-                mins, secs = divmod(self.temp, 60)
-
-                # Converting the input entered in mins or secs to hours.
-                hours = 0
-                if mins > 60:
-                    hours, mins = divmod(mins, 60)
-
-                self.hour.set("{0:2d}".format(hours))
-                self.minute.set("{0:2d}".format(mins))
-                self.second.set("{0:2d}".format(secs))
-
-                # updating the GUI window after decrementing the self.temp
-                # value every time, and turns the entries to read only to
-                # prevent interruptions
-                root.update()
-
-                if not self.paused:
-                    # Updates the index label incase it's paused.
-                    root.button_frame.update_index_label()
-
-                    # If self.temp value = 0, then go to the next image
-                    # or start a countdown.
-                    if self.temp == 0:
-
-                        if not self.resetted:
-                            if not self.from_open_folder:
-                                if (
-                                    self.heads_up.get()
-                                    and root.image_frame.frame_index + 1
-                                    in root.image_frame.reachable_images
-                                    and self.countdown_needed
-                                    or root.button_frame.loop_or_not.get()
-                                    and self.heads_up.get()
-                                    and self.countdown_needed
-                                ):
-                                    self.heads_up_countdown()
-                                else:
-                                    self.time_next_image()
-
-                            else:
-                                self.from_open_folder = False
-
-                        else:
-                            self.reset_time(disable_time_button=False)
-                            self.resetted = False
-                            self.from_open_folder = False
-                            self.countdown_needed = True
-                            self.time_entry_state("normal")
-                            self.time_button_state(
-                                start_state="normal",
-                                pause_state="disabled",
-                                reset_state="disabled",
-                            )
-                        break
-
-                    else:
-                        self.from_open_folder = False
-                        self.time_entry_state("readonly")
-                        if not self.time_start:
-                            self.timer = Timer(1, self.reduce_temp_by_one_second)
-                            self.timer.start()
-                            self.time_start = True
 
-                else:
-                    # if it's paused, inform the user with the label
-                    root.button_frame.update_index_label()
+            if start_button_not or pause_button_not:
+                self.session_timer.forget_reached()
+            self.session_timer.start(self.temp)
+            self.session_timer.run(on_tick=self.tick, on_reached=self.time_ran_out)
 
         except ValueError:
             if (
@@ -1074,6 +1668,41 @@ class TimerFrame(ctk.CTkFrame):
             else:
                 self.start_time()
 
+    def tick(self, seconds_left: int) -> None:
+        """Updates the timer every time a second passes."""
+        self.temp = seconds_left
+        self.root.trace.instant("tick", "timer", seconds_left=self.temp)
+        self.show_time(self.temp)
+        self.root.button_frame.update_index_label()
+
+    def time_ran_out(self) -> None:
+        """Goes to the next image, or starts a countdown to it."""
+        if (
+            self.heads_up.get()
+            and self.root.image_frame.frame_index + 1
+            in self.root.image_frame.image_queue
+            or self.root.button_frame.loop_or_not.get()
+            and self.heads_up.get()
+        ):
+            self.heads_up_countdown()
+        else:
+            self.time_next_image()
+
+    def show_time(self, seconds: int) -> None:
+        """Shows the amount of seconds in the hour, minute, and second
+        entries.
+        """
+        mins, secs = divmod(seconds, 60)
+
+        # Converting the input entered in mins or secs to hours.
+        hours = 0
+        if mins > 60:
+            hours, mins = divmod(mins, 60)
+
+        self.hour.set("{0:2d}".format(hours))
+        self.minute.set("{0:2d}".format(mins))
+        self.second.set("{0:2d}".format(secs))
+
     def pause_time(self):
         # shuts off the settings menu if it's popped up
         self.root.settings_menu.close_menu()
@@ -1085,12 +1714,17 @@ class TimerFrame(ctk.CTkFrame):
 
         else:
             self.paused = True
+            self.session_timer.stop()
+            self.temp = self.session_timer.seconds_left()
+            self.show_time(self.temp)
             self.time_entry_state("normal")
 
+            # if it's paused, inform the user with the label
+            self.root.button_frame.update_index_label()
+
     def reset_time(
         self,
         disable_time_button=True,
-        from_folder_open=False,
         turn_off_settings_menu=False,
     ) -> None:
         """Resets the timer by setting the temp to 0, ending its process
@@ -1102,19 +1736,14 @@ class TimerFrame(ctk.CTkFrame):
         if turn_off_settings_menu:
             self.root.settings_menu.close_menu()
 
+        # stops the timer (or the countdown) from ticking
+        self.session_timer.stop()
         self.paused = False
         self.temp = 0
 
         if self.save_temp <= 0:
             self.save_temp = 30
 
-        # let the self.start_time method know that it's resetted.
-        self.resetted = True
-
-        if from_folder_open:
-            self.from_open_folder = True
-            self.countdown_needed = False
-
         # let the entry states be editable again
         self.time_entry_state("normal")
 
@@ -1123,15 +1752,9 @@ class TimerFrame(ctk.CTkFrame):
                 start_state="normal", pause_state="disabled", reset_state="disabled"
             )
 
-        mins, secs = divmod(self.save_temp, 60)
-        hours = 0
-        if mins > 60:
-            hours, mins = divmod(mins, 60)
-        self.hour.set("{0:2d}".format(hours))
-        self.minute.set("{0:2d}".format(mins))
-        self.second.set("{0:2d}".format(secs))
+        self.show_time(self.save_temp)
 
-        root.button_frame.update_index_label()
+        self.root.button_frame.update_index_label()
 
     def heads_up_setting(self):
         if self.heads_up.get():
@@ -1140,13 +1763,7 @@ class TimerFrame(ctk.CTkFrame):
             self.heads_up.set(False)
 
         self.values["countdown"] = self.heads_up.get()
-        self.root.save_load_system.save_value(
-            input_value=str(self.values), file_name=self.root.save_load_system.file_name
-        )
-
-    def reduce_temp_by_one_second(self):
-        self.temp -= 1
-        self.time_start = False
+        self.root.save_load_system.save()
 
     def heads_up_countdown(self):
         """Counts down 3 seconds for the next image if self.heads_up is
@@ -1158,56 +1775,103 @@ class TimerFrame(ctk.CTkFrame):
         self.minute.set("0")
         self.second.set("3")
         self.temp = 3
-        root.update()
 
-        root.button_frame.image_button_state("disabled")
-        root.settings_menu.image_limit_save_button.configure(state="disabled")
-        root.settings_menu.image_limit_entry.configure(state="disabled")
+        self.root.button_frame.image_button_state("disabled")
         self.time_entry_state("readonly")
         self.time_button_state(
             start_state="disabled", pause_state="disabled", reset_state="disabled"
         )
         self.root.settings_menu.image_limit_state(normal_or_disabled="disabled")
 
+        # resizes every countdown image for the current canvas size so
+        # that the countdown only has to swap them
+        for number in self.countdown_image_dict[ctk.get_appearance_mode()]:
+            self.root.image_frame.prepare_photo_image(
+                image_key=self.countdown_image_key(number),
+                image=self.countdown_image(number),
+                width=self.root.image_frame.image_displayer.winfo_width(),
+                height=self.root.image_frame.image_displayer.winfo_height(),
+            )
+        self.shown_countdown = None
+
         # counts down 3 seconds
-        while self.temp >= 0:
-            if self.temp > 0:
-                root.image_frame.image_original = Image.open(
-                    resource_path(
-                        self.countdown_image_dict[ctk.get_appearance_mode()][self.temp]
-                    )
+        self.root.trace.instant("countdown start", "timer")
+        self.session_timer.start(self.temp)
+        self.session_timer.run(
+            on_tick=self.countdown_tick, on_reached=self.countdown_ran_out
+        )
+
+    def countdown_tick(self, seconds_left: int) -> None:
+        """Shows the countdown image of every second of the countdown."""
+        self.temp = seconds_left
+
+        # setting the countdown entries
+        self.second.set("{0:2d}".format(self.temp))
+
+        if self.temp > 0:
+            if self.temp != self.shown_countdown:
+                self.shown_countdown = self.temp
+                self.root.image_frame.image_original = self.countdown_image(self.temp)
+                self.root.image_frame.image_key = self.countdown_image_key(self.temp)
+                self.root.image_frame.image_ratio = (
+                    self.root.image_frame.image_original.size[0]
+                    / self.root.image_frame.image_original.size[1]
                 )
-                root.image_frame.image_ratio = (
-                    root.image_frame.image_original.size[0]
-                    / root.image_frame.image_original.size[1]
-                )
-                root.image_frame.show_full_image(
-                    root.image_frame.image_displayer.winfo_width(),
-                    root.image_frame.image_displayer.winfo_height(),
+                self.root.image_frame.show_full_image(
+                    self.root.image_frame.image_displayer.winfo_width(),
+                    self.root.image_frame.image_displayer.winfo_height(),
                 )
 
-            # setting the countdown entries
-            self.second.set("{0:2d}".format(self.temp))
-            self.time_button_state(
-                start_state="disabled", pause_state="disabled", reset_state="disabled"
-            )
+                # gets the next image ready on the last second so that
+                # it can be shown right away
+                if self.temp == 1:
+                    self.root.image_frame.prepare_next_image()
+
+    def countdown_ran_out(self) -> None:
+        """Goes to the next image once the countdown reaches 0."""
+        self.root.trace.instant("countdown end", "timer")
+        self.root.button_frame.image_button_state("normal")
+        self.root.settings_menu.image_limit_state(normal_or_disabled="normal")
+        if self.currently_counting_down:
+            self.time_next_image()
+        else:
+            # the queue was replaced during the countdown, so the next
+            # timer starts from when it's started
+            self.session_timer.forget_reached()
+        self.currently_counting_down = False
 
-            root.update()
+    def load_countdown_image(self, path: str) -> Image.Image:
+        return self.root.icon_atlas.icon(path)
 
-            if self.temp == 0:
-                root.button_frame.image_button_state("normal")
-                self.root.settings_menu.image_limit_state(normal_or_disabled="normal")
-                if self.currently_counting_down:
-                    self.time_next_image()
-                self.currently_counting_down = False
-                break
+    def load_countdown_images(self) -> None:
+        """Starts decoding the countdown images on a background thread,
+        if they haven't been already.
+        """
+        if self.countdown_images:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.countdown_images = {
+            appearance_mode: {
+                number: executor.submit(self.load_countdown_image, path)
+                for number, path in paths.items()
+            }
+            for appearance_mode, paths in self.countdown_image_dict.items()
+        }
+        executor.shutdown(wait=False)
 
-            else:
-                self.time_entry_state("readonly")
-                if not self.time_start:
-                    self.timer = Timer(1, self.reduce_temp_by_one_second)
-                    self.timer.start()
-                    self.time_start = True
+    def countdown_image(self, number: int) -> Image.Image:
+        """Returns the countdown image of a number for the current theme,
+        waiting for it to be decoded if it hasn't been yet.
+        """
+        self.load_countdown_images()
+        return self.countdown_images[ctk.get_appearance_mode()][number].result()
+
+    def countdown_image_key(self, number: int) -> tuple[str, int]:
+        """Returns the key show_full_image caches a countdown image's
+        resized versions with.
+        """
+        return self.countdown_image_dict[ctk.get_appearance_mode()][number], 0
 
     def time_next_image(self):
         """Goes to the next image or resets the timer for once the timer
@@ -1218,37 +1882,33 @@ class TimerFrame(ctk.CTkFrame):
         # go to the next image without being told to.
         self.next_image = False
 
-        # goes to next image
-        if root.image_frame.frame_index + 1 in root.image_frame.reachable_images:
-            root.image_frame.frame_index += 1
-            self.next_image = True
-
-        elif root.image_frame.frame_index + 1 not in root.image_frame.reachable_images:
-            if root.button_frame.loop_or_not.get():
-                # set image index back to the first image's
-                root.image_frame.frame_index = root.image_frame.reachable_images[0]
-                self.next_image = True
-            else:
-                # if the alert box is enabled
-                if root.timer_frame.folder_complete_bool.get():
-                    messagebox.showinfo("Folder Complete", "Folder has been exhausted.")
+        # goes to next image, or back to the first image if loop is on
+        self.next_image = self.root.image_frame.session.advance(
+            loop=self.root.button_frame.loop_or_not.get()
+        )
+        if not self.next_image:
+            # if the alert box is enabled
+            if self.folder_complete_bool.get():
+                messagebox.showinfo("Folder Complete", "Folder has been exhausted.")
 
-                self.reset_time()
-                self.resetted = False
+            self.reset_time()
 
         try:
-            # update the image in root.image_frame
-            root.button_frame.update_image_original()
+            # the timer ran out on the last image of the queue
+            if not self.next_image and self.root.session_history is not None:
+                self.root.session_history.end_view(completed=True)
+
+            # update the image in image_frame
+            self.root.button_frame.update_image_original(completed=self.next_image)
 
             # update the index label
-            root.button_frame.update_index_label()
+            self.root.button_frame.update_index_label()
 
         except IndexError:
             print("No folder has been selected yet.")
 
         if self.next_image:
             self.reset_time(disable_time_button=False)
-            self.resetted = False
             self.start_time()
 
     def folder_complete_alert_not(self):
@@ -1259,9 +1919,7 @@ class TimerFrame(ctk.CTkFrame):
             self.folder_complete_bool.set(False)
 
         self.values["alert_queue_complete"] = self.folder_complete_bool.get()
-        self.root.save_load_system.save_value(
-            input_value=str(self.values), file_name=self.root.save_load_system.file_name
-        )
+        self.root.save_load_system.save()
 
 
 class ButtonFrame(ctk.CTkFrame):
@@ -1300,53 +1958,35 @@ class ButtonFrame(ctk.CTkFrame):
         # # Change image buttons (The images are the same for both dark
         # # and light mode)
         self.previous_image_png = ctk.CTkImage(
-            light_image=Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/"
-                    "previous_image_button.png"
-                )
+            light_image=self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/" "previous_image_button.png"
             ),
-            dark_image=Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/"
-                    "previous_image_button.png"
-                )
+            dark_image=self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/" "previous_image_button.png"
             ),
         )
         self.next_image_png = ctk.CTkImage(
-            Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/next_image_button.png"
-                )
+            self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/next_image_button.png"
             ),
-            Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/" "next_image_button.png"
-                )
+            self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/" "next_image_button.png"
             ),
         )
         self.first_image_png = ctk.CTkImage(
-            Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/first_image_button.png"
-                )
+            self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/first_image_button.png"
             ),
-            Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/" "first_image_button.png"
-                )
+            self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/" "first_image_button.png"
             ),
         )
         self.last_image_png = ctk.CTkImage(
-            Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/" "last_image_button.png"
-                )
+            self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/" "last_image_button.png"
             ),
-            Image.open(
-                resource_path(
-                    "app_widget_images/change_image_buttons/" "last_image_button.png"
-                )
+            self.root.icon_atlas.icon(
+                "app_widget_images/change_image_buttons/" "last_image_button.png"
             ),
         )
 
@@ -1416,11 +2056,7 @@ class ButtonFrame(ctk.CTkFrame):
         try:
             # the variable that tells the label the X it needs to show
             # in "n image out of x"
-            out_of_n = (
-                root.image_frame.image_amount
-                if root.image_frame.image_limit_display == "Unlimited"
-                else root.image_frame.image_limit_display
-            )
+            out_of_n = len(self.root.image_frame.image_queue)
 
             # the variable that may or may not be changed depending on
             # if there's anything going on right now
@@ -1428,14 +2064,15 @@ class ButtonFrame(ctk.CTkFrame):
 
             # if it's the end of the queue and it's not paused
             if (
-                root.image_frame.frame_index == root.image_frame.reachable_images[-1]
-                and not root.timer_frame.paused
+                self.root.image_frame.frame_index
+                == self.root.image_frame.image_queue.last
+                and not self.root.timer_frame.paused
                 and not self.loop_or_not.get()
             ):
                 end_modifier = " (Queue Finished)"
 
             # else if it's paused (+ if it's also on loop)
-            elif root.timer_frame.paused:
+            elif self.root.timer_frame.paused:
                 end_modifier = (
                     " (Paused)" if not self.loop_or_not.get() else " (Paused, On Loop)"
                 )
@@ -1446,32 +2083,34 @@ class ButtonFrame(ctk.CTkFrame):
 
             # if an image limit is set up, display the total number of
             # images in parentheses
-            if root.image_frame.image_limit_display != "Unlimited":
-                end_modifier = f" ({root.image_frame.image_amount}) {end_modifier}"
+            if self.root.image_frame.image_limit_display != "Unlimited":
+                image_amount = self.root.image_frame.image_queue.image_amount
+                end_modifier = f" ({image_amount}) {end_modifier}"
+
+            # if folders are still being scanned, show how far along
+            end_modifier += self.root.scan_progress()
 
             self.image_order_index.set(
-                f"Image no. {root.image_frame.frame_index + 1}/"
+                f"Image no. {self.root.image_frame.frame_index + 1}/"
                 f"{out_of_n}{end_modifier}"
             )
             self.index_label.configure(textvariable=self.image_order_index)
 
         except IndexError:
-            print(
-                "IndexLabelUpdateError: No folder has been selected yet.\n"
-                "\t\t\t\t\t   Nothing should go wrong, though."
-            )
+            # no folder has been selected yet, nothing goes wrong though
+            self.root.trace.instant("index label without images", "image")
 
     def image_button_state(self, normal_or_disabled: str) -> None:
         # setting the time entry states
         for button in [
-            "first_image_button",
-            "previous_image_button",
-            "next_image_button",
-            "last_image_button",
+            self.first_image_button,
+            self.previous_image_button,
+            self.next_image_button,
+            self.last_image_button,
         ]:
-            exec(
-                f"self.{button}.configure(state=normal_or_disabled,"
-                f"fg_color=self.root.button_theme_color[normal_or_disabled])"
+            button.configure(
+                state=normal_or_disabled,
+                fg_color=self.root.button_theme_color[normal_or_disabled],
             )
 
         # setting the keyboard button shortcuts accordingly + set the
@@ -1479,18 +2118,20 @@ class ButtonFrame(ctk.CTkFrame):
         if normal_or_disabled == "normal":
             # shortcut binds
             self.root.bind(
-                "<Down>", lambda _: root.button_frame.change_image(first_or_last=True)
+                "<Down>",
+                lambda _: self.root.button_frame.change_image(first_or_last=True),
             )
             self.root.bind(
                 "<Right>",
-                lambda _: root.button_frame.change_image(next_or_previous=True),
+                lambda _: self.root.button_frame.change_image(next_or_previous=True),
             )
             self.root.bind(
                 "<Left>",
-                lambda _: root.button_frame.change_image(next_or_previous=False),
+                lambda _: self.root.button_frame.change_image(next_or_previous=False),
             )
             self.root.bind(
-                "<Up>", lambda _: root.button_frame.change_image(first_or_last=False)
+                "<Up>",
+                lambda _: self.root.button_frame.change_image(first_or_last=False),
             )
 
         else:
@@ -1509,20 +2150,52 @@ class ButtonFrame(ctk.CTkFrame):
                 "<Up>", lambda _: print("Last Image shortcut currently disabled.")
             )
 
-    def update_image_original(self) -> None:
-        self.root.image_frame.image_original = Image.open(
-            resource_path(
-                self.root.image_frame.directory_list[self.root.image_frame.frame_index]
+    def update_image_original(self, completed=False) -> None:
+        """Shows the image at the current position of the queue.
+
+        :param completed: Whether the image before it was shown until
+        the timer ran out, for the session history.
+        """
+        path = resource_path(
+            self.root.image_frame.image_path(self.root.image_frame.frame_index)
+        )
+        self.root.trace.instant(
+            "image requested", "image", position=self.root.image_frame.frame_index
+        )
+        with self.root.profiler.stage("image_change"):
+            try:
+                image_key, image_original = self.root.image_frame.image_prefetcher.get(
+                    path=path,
+                    canvas_size=(
+                        self.root.image_frame.image_displayer.winfo_width(),
+                        self.root.image_frame.image_displayer.winfo_height(),
+                    ),
+                )
+            except Exception as e:
+                # a broken or unsupported file is shown as the placeholder,
+                # so that the timer and the rest of the queue keep going
+                print(f"ImageLoadWarning: Could not open {path}: {e}")
+                self.root.trace.instant("image failed", "image", path=path)
+                image_key, image_original = (
+                    None,
+                    self.root.image_frame.placeholder_image,
+                )
+            self.root.image_frame.image_key = image_key
+            self.root.image_frame.image_original = image_original
+            self.root.image_frame.image_ratio = (
+                self.root.image_frame.image_original.size[0]
+                / self.root.image_frame.image_original.size[1]
             )
-        )
-        self.root.image_frame.image_ratio = (
-            self.root.image_frame.image_original.size[0]
-            / self.root.image_frame.image_original.size[1]
-        )
-        self.root.image_frame.show_full_image(
-            self.root.image_frame.image_displayer.winfo_width(),
-            self.root.image_frame.image_displayer.winfo_height(),
-        )
+            self.root.image_frame.show_full_image(
+                self.root.image_frame.image_displayer.winfo_width(),
+                self.root.image_frame.image_displayer.winfo_height(),
+            )
+        self.root.trace.instant("displayed", "image", path=path)
+
+        # gets the next and previous images ready
+        self.root.image_frame.prefetch_neighbours()
+
+        self.root.record_image_view(completed=completed)
 
     def change_image(self, next_or_previous=None, first_or_last=None) -> None:
         """Changes the image in the image displayer through the image
@@ -1533,74 +2206,27 @@ class ButtonFrame(ctk.CTkFrame):
         self.root.settings_menu.close_menu()
 
         try:
-            if next_or_previous or first_or_last:
-                # set frame index to the next image's if it's available
-                if (
-                    root.image_frame.frame_index + 1
-                    in root.image_frame.reachable_images
-                    and first_or_last is None
-                ):
-                    root.image_frame.frame_index += 1
-
-                # if loop is on or if the button = first
-                elif (
-                    root.image_frame.frame_index + 1
-                    not in root.image_frame.reachable_images
-                    and self.loop_or_not.get()
-                    or first_or_last
-                    and next_or_previous is None
-                ):
-
-                    # re-shuffles the image directory after a loop
-                    if (
-                        root.image_frame.randomize_list_bool.get()
-                        and first_or_last is None
-                    ):
-                        shuffle(root.image_frame.directory_list)
-
-                    # set image index back to the first image's
-                    root.image_frame.frame_index = root.image_frame.reachable_images[0]
-
-            elif not next_or_previous or not first_or_last:
-                # set frame index to the previous image's
-                if (
-                    root.image_frame.frame_index - 1
-                    in root.image_frame.reachable_images
-                    and first_or_last is None
-                ):
-                    root.image_frame.frame_index -= 1
-
-                # if loop is on or if the button = last
-                elif (
-                    root.image_frame.frame_index - 1
-                    not in root.image_frame.reachable_images
-                    and self.loop_or_not.get()
-                    or not first_or_last
-                    and next_or_previous is None
-                ):
-
-                    # re-shuffles the image directory after a loop if
-                    # the randomize list option is on
-                    if (
-                        root.image_frame.randomize_list_bool.get()
-                        and first_or_last is None
-                    ):
-                        shuffle(root.image_frame.directory_list)
-
-                    # set frame index to the last image's
-                    root.image_frame.frame_index = root.image_frame.reachable_images[-1]
+            if first_or_last is not None and next_or_previous is None:
+                # the first or the last image of the queue
+                self.root.image_frame.session.jump(to_first=first_or_last)
+            else:
+                # the next or previous image, going around the queue if
+                # loop is on and re-shuffling it if randomize is on
+                self.root.image_frame.session.step(
+                    forward=bool(next_or_previous),
+                    loop=self.loop_or_not.get(),
+                    reshuffle=self.root.image_frame.randomize_list_bool.get(),
+                )
 
-            # update the image in root.image_frame
+            # update the image in image_frame
             self.update_image_original()
 
             # update the label
             self.update_index_label()
 
         except IndexError:
-            print(
-                "ImageChange Error: No folder has been selected yet to be "
-                "able to change image to."
-            )
+            # no folder has been selected yet to change the image of
+            self.root.trace.instant("image change without images", "image")
 
     def loop_not_loop(self) -> None:
         """Changes the state of loop to on or off and updates the index
@@ -1613,9 +2239,11 @@ class ButtonFrame(ctk.CTkFrame):
             self.loop_or_not.set(False)
 
         self.values["loop"] = self.loop_or_not.get()
-        self.root.save_load_system.save_value(
-            input_value=str(self.values), file_name=self.root.save_load_system.file_name
-        )
+        self.root.save_load_system.save()
+
+        # going around the queue changes which images are next
+        if self.root.image_frame.directory_list:
+            self.root.image_frame.prefetch_neighbours()
 
         # updates the index label accordingly
         self.update_index_label()
@@ -1660,17 +2288,13 @@ class SettingsMenu(ctk.CTkButton):
         # setup
         self.parent = parent
         self.settings_icon = ctk.CTkImage(
-            light_image=Image.open(
-                resource_path("app_widget_images/settings_menu/settings_icon_dark.png")
+            light_image=self.parent.icon_atlas.icon(
+                "app_widget_images/settings_menu/settings_icon_dark.png"
             ),
-            dark_image=Image.open(
-                resource_path("app_widget_images/settings_menu/settings_icon_light.png")
+            dark_image=self.parent.icon_atlas.icon(
+                "app_widget_images/settings_menu/settings_icon_light.png"
             ),
         )
-        self.save_image_limit_icon = ctk.CTkImage(
-            Image.open(resource_path("app_widget_images/settings_menu/save_icon.png")),
-            Image.open(resource_path("app_widget_images/settings_menu/save_icon.png")),
-        )
         self.values = self.parent.save_load_system.values
 
         self.load_saved_temp_bool = ctk.BooleanVar(value=self.values["load_timer_temp"])
@@ -1693,6 +2317,44 @@ class SettingsMenu(ctk.CTkButton):
 
         self.menu_popped_up = False
 
+        # the pop up menu is only built once the window has been shown
+        # (see build_menu), along with the states it's built with
+        self.settings_pop_up_menu = None
+        self.image_limit_entry_state = "normal"
+        self.switch_folder_state = "disabled"
+
+        # close menu by clicking right click
+        self.parent.bind("<Button-3>", lambda _: self.close_menu())
+
+        # shortcut binds
+        self.parent.bind("<Alt_L>", lambda _: self.open_menu())
+        self.parent.bind("<Alt_R>", lambda _: self.open_menu())
+        self.parent.bind("<Alt-KeyPress-o>", lambda _: parent.open_folder())
+        self.parent.bind("<Control-KeyPress-o>", lambda _: parent.open_folder())
+        self.parent.bind("<Alt-KeyPress-s>", lambda _: switch_theme(parent))
+        self.parent.bind("<Escape>", lambda _: parent.cancel_folder_scans())
+
+        # run self
+        self.place(relx=0, rely=1, anchor="sw")
+
+    def build_menu(self) -> None:
+        """Builds the settings pop up menu if it hasn't been built yet. It
+        isn't needed for the window to be shown, so it's built right
+        after that, or when the menu is first opened.
+        """
+        if self.settings_pop_up_menu is not None:
+            return
+        parent = self.parent
+
+        self.save_image_limit_icon = ctk.CTkImage(
+            self.parent.icon_atlas.icon(
+                "app_widget_images/settings_menu/save_icon.png"
+            ),
+            self.parent.icon_atlas.icon(
+                "app_widget_images/settings_menu/save_icon.png"
+            ),
+        )
+
         # # settings pop up menu
         self.settings_pop_up_menu = ctk.CTkFrame(parent)
         self.buttons_menu = ctk.CTkFrame(
@@ -1725,14 +2387,14 @@ class SettingsMenu(ctk.CTkButton):
         self.switch_theme = ctk.CTkButton(
             self.buttons_menu,
             text="Switch Themes (Alt+S)",
-            command=lambda: switch_theme(),
+            command=lambda: switch_theme(parent),
             fg_color=self.parent.button_theme_color["normal"],
             hover_color=self.parent.button_theme_color["hover_color"],
         )
         self.switch_folder_button = ctk.CTkButton(
             self.buttons_menu,
             text="Switch to New Folder (Alt+Shift+O)",
-            command=lambda: root.open_folder(reset_queue=True),
+            command=lambda: parent.open_folder(reset_queue=True),
             fg_color=self.parent.button_theme_color["disabled"],
             hover_color=self.parent.button_theme_color["hover_color"],
             state="disabled",
@@ -1848,23 +2510,15 @@ class SettingsMenu(ctk.CTkButton):
         self.checkbox_menu.pack(ipady=4, fill="x")
         self.more_settings_menu.pack(ipady=4, fill="x")
 
-        # close menu by clicking right click
-        self.parent.bind("<Button-3>", lambda _: self.close_menu())
-
-        # shortcut binds
-        self.parent.bind("<Alt_L>", lambda _: self.open_menu())
-        self.parent.bind("<Alt_R>", lambda _: self.open_menu())
-        self.parent.bind("<Alt-KeyPress-o>", lambda _: parent.open_folder())
-        self.parent.bind("<Control-KeyPress-o>", lambda _: parent.open_folder())
-        self.parent.bind("<Alt-KeyPress-s>", lambda _: switch_theme())
-        self.image_limit_entry.bind(
-            "<Return>", lambda _: self.parent.image_frame.save_image_limit()
-        )
-
-        # run self
-        self.place(relx=0, rely=1, anchor="sw")
+        # states that were set before the menu was built
+        self.image_limit_state(normal_or_disabled=self.image_limit_entry_state)
+        self.set_switch_folder_state(normal_or_disabled=self.switch_folder_state)
 
     def image_limit_state(self, normal_or_disabled: str):
+        self.image_limit_entry_state = normal_or_disabled
+        if self.settings_pop_up_menu is None:
+            return
+
         self.image_limit_entry.configure(
             state=normal_or_disabled,
             text_color=(
@@ -1885,12 +2539,23 @@ class SettingsMenu(ctk.CTkButton):
             fg_color=self.parent.button_theme_color[normal_or_disabled]
         )
 
+    def set_switch_folder_state(self, normal_or_disabled: str) -> None:
+        self.switch_folder_state = normal_or_disabled
+        if self.settings_pop_up_menu is None:
+            return
+
+        self.switch_folder_button.configure(
+            state=normal_or_disabled,
+            fg_color=self.parent.button_theme_color[normal_or_disabled],
+        )
+
     def close_menu(self):
         if self.menu_popped_up:
             self.settings_pop_up_menu.place_forget()
             self.menu_popped_up = False
 
     def open_menu(self):
+        self.build_menu()
         if not self.menu_popped_up:
             self.settings_pop_up_menu.place(relx=0, rely=0.95, anchor="sw")
             self.menu_popped_up = True
@@ -1908,10 +2573,7 @@ class SettingsMenu(ctk.CTkButton):
             self.load_saved_temp_bool.set(False)
 
         self.values["load_timer_temp"] = self.load_saved_temp_bool.get()
-        self.parent.save_load_system.save_value(
-            input_value=str(self.values),
-            file_name=self.parent.save_load_system.file_name,
-        )
+        self.parent.save_load_system.save()
 
     def load_saved_directories_not(self):
         """Changes the state of the load_timer_temp_bool variable from
@@ -1923,16 +2585,203 @@ class SettingsMenu(ctk.CTkButton):
             self.load_saved_directories_bool.set(False)
 
         self.values["load_saved_directories"] = self.load_saved_directories_bool.get()
-        self.parent.save_load_system.save_value(
-            input_value=str(self.values),
-            file_name=self.parent.save_load_system.file_name,
-        )
+        self.parent.save_load_system.save()
+
+
+class IconAtlas:
+    """Every icon of the app, packed into a single atlas image by
+    scripts/build_atlas.py along with a manifest of where every icon is
+    inside of it. The atlas is read and decoded once, and every icon is
+    cut out of it after that. Icons that aren't in the atlas (or if the
+    atlas hasn't been built) are opened from their own files instead.
+    """
+
+    def __init__(self, manifest_path: str) -> None:
+        """
+        :param manifest_path: The manifest written next to the atlas
+        image.
+        """
+        self.icons = {}
+        self.atlas = None
+        self.cut_out: dict[str, Image.Image] = {}
+        self.lock = Lock()
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.atlas = Image.open(
+                os.path.join(os.path.dirname(manifest_path), manifest["image"])
+            )
+            self.atlas.load()
+            self.icons = manifest["icons"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"IconAtlasWarning: The icons will be opened one by one: {e}")
+
+    def icon(self, path: str) -> Image.Image:
+        """Returns an icon by its path from the root of the app, the same
+        size as the icon's own file. The border around the icon isn't
+        kept in the atlas, so it's added back as transparent pixels.
+        Icons are only cut out once, the same image is returned after
+        that.
+        """
+        with self.lock:
+            if path in self.cut_out:
+                return self.cut_out[path]
+
+            if path not in self.icons or self.atlas is None:
+                try:
+                    icon = Image.open(resource_path(path))
+                except FileNotFoundError as e:
+                    raise FileNotFoundError(
+                        f"The icon {path} is neither in the icon atlas nor in "
+                        "its own file, rebuild the atlas with "
+                        "scripts/build_atlas.py and bundle app_widget_images."
+                    ) from e
+            else:
+                x, y, width, height = self.icons[path]["box"]
+                icon = Image.new("RGBA", tuple(self.icons[path]["size"]), (0, 0, 0, 0))
+                icon.paste(
+                    self.atlas.crop((x, y, x + width, y + height)),
+                    tuple(self.icons[path]["offset"]),
+                )
+            self.cut_out[path] = icon
+            return icon
+
+
+class LiteralParser:
+    """Parses the text that str() gives for a dictionary back into the
+    dictionary. Only dictionaries, lists, strings, numbers, bools, and
+    None are accepted, and the text is read in a single pass instead of
+    being compiled as Python code.
+    """
+
+    token_pattern = re.compile(
+        r"""\s*(?:
+        (?P<symbol>[{}\[\](),:])
+        |(?P<string>'[^'\\\n]*(?:\\.[^'\\\n]*)*'|"[^"\\\n]*(?:\\.[^"\\\n]*)*")
+        |(?P<number>-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+        |(?P<name>True|False|None)
+        )""",
+        re.VERBOSE,
+    )
+    escape_pattern = re.compile(
+        r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|[0-7]{1,3}|.)",
+        re.DOTALL,
+    )
+    escaped_characters = {
+        "\\": "\\",
+        "'": "'",
+        '"': '"',
+        "a": "\a",
+        "b": "\b",
+        "f": "\f",
+        "n": "\n",
+        "r": "\r",
+        "t": "\t",
+        "v": "\v",
+    }
+    names = {"True": True, "False": False, "None": None}
+
+    def __init__(self, text: str) -> None:
+        """
+        Initializes a new LiteralParser object.
+
+        :param text: The text to parse.
+        :raises SyntaxError: If the text has anything other than the
+        accepted literals in it.
+        """
+        self.tokens = self._tokenize(text.strip())
+        self.index = 0
+
+    def parse(self) -> Any:
+        """Returns the value of the text.
+
+        :raises SyntaxError: If the literals aren't put together the way
+        str() puts them together, or can't be turned into values.
+        """
+        try:
+            value = self._value()
+        except RecursionError:
+            raise SyntaxError("The values are nested too deeply.") from None
+        except (TypeError, ValueError) as e:
+            # unhashable keys, and escapes or numbers that are too big
+            raise SyntaxError(str(e)) from e
+        if self.tokens[self.index][0] != "end":
+            raise SyntaxError(
+                f"Unexpected {self.tokens[self.index][1]!r} after the value."
+            )
+        return value
+
+    def _tokenize(self, text: str) -> list[tuple[str, str]]:
+        tokens = []
+        position = 0
+        for match in self.token_pattern.finditer(text):
+            if match.start() != position:
+                break
+            kind = match.lastgroup
+            tokens.append((kind, match[kind]))
+            position = match.end()
+        if position != len(text):
+            raise SyntaxError(f"Unexpected text at character {position}.")
+        tokens.append(("end", ""))
+        return tokens
+
+    def _value(self) -> Any:
+        kind, token = self.tokens[self.index]
+        self.index += 1
+        if kind == "string":
+            if "\\" not in token:
+                return token[1:-1]
+            return self.escape_pattern.sub(self._unescape, token[1:-1])
+        if kind == "number":
+            return float(token) if any(c in token for c in ".eE") else int(token)
+        if kind == "name":
+            return self.names[token]
+        if token == "[":
+            return self._items(closing="]", item=self._value)
+        if token == "{":
+            return dict(self._items(closing="}", item=self._pair))
+        raise SyntaxError(f"Unexpected {token or 'end of text'!r}.")
+
+    def _pair(self) -> tuple[Any, Any]:
+        key = self._value()
+        self._expect(":")
+        return key, self._value()
+
+    def _items(self, closing: str, item: Callable[[], Any]) -> list:
+        items = []
+        while self.tokens[self.index][1] != closing:
+            items.append(item())
+            if self.tokens[self.index][1] != closing:
+                self._expect(",")
+        self.index += 1
+        return items
+
+    def _expect(self, symbol: str) -> None:
+        if self.tokens[self.index][1] != symbol:
+            raise SyntaxError(
+                f"Expected {symbol!r}, got {self.tokens[self.index][1]!r}."
+            )
+        self.index += 1
+
+    def _unescape(self, match: re.Match) -> str:
+        escape = match.group(1)
+        if escape[0] in "xuU" and len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        if escape[0] in "01234567":
+            return chr(int(escape, 8))
+        return self.escaped_characters.get(escape, match.group(0))
 
 
 class SaveLoadSystem:
     """
     A simple save and load system that uses a .txt file with a
     Python dictionary by default.
+
+    Changes to the values are written behind: save() only marks them as
+    changed, and a background thread writes every change made within
+    write_delay seconds in one go. The file is written into a temporary
+    file first and then swapped in, so a crash in the middle of a write
+    never leaves a broken file behind.
     """
 
     def __init__(
@@ -1941,6 +2790,8 @@ class SaveLoadSystem:
         default_values: dict,
         extension: str = "txt",
         mutable_keys: bool = True,
+        write_delay: float = 0.5,
+        trace: EventTrace | None = None,
     ) -> None:
         """
         Initializes a new SaveLoadSystem object.
@@ -1951,7 +2802,12 @@ class SaveLoadSystem:
         :param default_values: The default values of the file.
         :param mutable_keys: Whether the keys can be different
         from the values within default_values or not.
+        :param write_delay: The amount of seconds changes are gathered
+        for before they're written.
+        :param trace: Where loading and writing the values is recorded.
         """
+        self.trace = trace if trace is not None else EventTrace()
+
         # Create the file name and its extension with the arguments,
         # this accounts for the use of a period before the extension of
         # the file.
@@ -1967,14 +2823,68 @@ class SaveLoadSystem:
                 values_to_compare_to=default_values,
             )
 
+        # the values that are waiting to be written, the writer only
+        # ever writes the latest ones
+        self.write_delay = write_delay
+        self._pending_values: str | None = None
+        self._pending_lock = Lock()
+        self._write_lock = Lock()
+        self._changed = Event()
+        self._writer = Thread(target=self._write_behind, daemon=True)
+        self._writer.start()
+
+        # whatever hasn't been written yet is written when the app closes
+        atexit.register(self.flush)
+
+    def save(self) -> None:
+        """Marks the values as changed. They're written to the file on a
+        background thread within write_delay seconds.
+        """
+        with self._pending_lock:
+            self._pending_values = str(self.values)
+        self._changed.set()
+
+    def flush(self) -> None:
+        """Writes the changed values to the file right away, if there are
+        any.
+        """
+        with self._write_lock:
+            with self._pending_lock:
+                values, self._pending_values = self._pending_values, None
+            if values is None:
+                return
+            try:
+                with self.trace.span(
+                    "preferences write", "preferences", file_name=self.file_name
+                ):
+                    self.save_value(input_value=values, file_name=self.file_name)
+            except OSError as e:
+                print(f"SaveLoadWarning: Could not save {self.file_name}: {e}")
+
+    def _write_behind(self) -> None:
+        """Runs on its own thread, and writes the changed values once
+        write_delay seconds have passed since the first change.
+        """
+        while True:
+            self._changed.wait()
+            sleep(self.write_delay)
+            self._changed.clear()
+            self.flush()
+
     def _load_default_values(
         self,
         file_name: str,
         values_to_load: dict,
-        log: str = "Default values loaded: ",
+        log: str = "Default values loaded",
     ) -> dict:
-        print(f"{log}" f"{values_to_load if values_to_load is not None else {}}")
         values = values_to_load if values_to_load is not None else {}
+        self.trace.instant(
+            "default preferences loaded",
+            "preferences",
+            file_name=file_name,
+            reason=log,
+            values=str(values),
+        )
         self.save_value(input_value=values, file_name=file_name)
         return values
 
@@ -1993,24 +2903,31 @@ class SaveLoadSystem:
         # Tries to open the file with the file name, and makes it into a
         # new file if it's not there yet.
         try:
-            values = ast.literal_eval(self.load_value(file_name))
-            print(f"Loaded values: {values}")
-        except FileNotFoundError:
-            values = load_default_values(
-                f"Creating a new {file_name} (values file)...\n" f"Default values: "
+            values = self.parse_values(self.load_value(file_name))
+            self.trace.instant(
+                "preferences loaded",
+                "preferences",
+                file_name=file_name,
+                values=str(values),
             )
+        except FileNotFoundError:
+            values = load_default_values(f"Creating a new {file_name} (values file)")
         except SyntaxError as e:
+            print(
+                "SaveLoadWarning: Loading the default values, "
+                f"{file_name} is broken: {e}"
+            )
             values = load_default_values(
-                f"{file_name} (values file) is empty or has incorrect "
-                f"syntax...\n"
-                f"Default values loaded: "
+                f"{file_name} (values file) is empty or has incorrect syntax"
             )
             show_warning_messagebox(title="SyntaxError", error=e)
         except ValueError as e:
+            print(
+                "SaveLoadWarning: Loading the default values, "
+                f"{file_name} is broken: {e}"
+            )
             values = load_default_values(
-                f"The values in {file_name} (values file) cannot be "
-                f"parsed...\n"
-                f"Default values loaded: "
+                f"The values in {file_name} (values file) cannot be parsed"
             )
             show_warning_messagebox(title="ValueError", error=e)
 
@@ -2021,6 +2938,11 @@ class SaveLoadSystem:
     ) -> dict:
         differing_keys = set(values.keys()).difference(set(values_to_compare_to.keys()))
 
+        # keys added in newer versions are filled in with their default
+        # values
+        for key in set(values_to_compare_to.keys()).difference(set(values.keys())):
+            values[key] = values_to_compare_to[key]
+
         if not differing_keys:
             return values
 
@@ -2032,19 +2954,23 @@ class SaveLoadSystem:
             f"Differing keys: {differing_keys}",
         )
         values = self._load_default_values(
-            log=f"(mutable_keys=False) Loaded values have different keys...\n"
-            f"Differing keys: {differing_keys}"
-            f"Default values loaded: ",
+            log=f"(mutable_keys=False) Loaded values have different keys: "
+            f"{sorted(differing_keys, key=str)}",
             values_to_load=values_to_compare_to,
             file_name=file_name,
         )
         return values
 
-    # Saves the values by re-writing the values into the file.
+    # Saves the values by writing them into a temporary file, and then
+    # replacing the file with it.
     @staticmethod
     def save_value(input_value, file_name):
-        with open(file_name, "w") as f:
+        temp_file_name = f"{file_name}.tmp"
+        with open(temp_file_name, "w") as f:
             f.write(str(input_value))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file_name, file_name)
 
     # loads the values by reading the file and returning the result
     @staticmethod
@@ -2053,6 +2979,14 @@ class SaveLoadSystem:
             read = f.read()
         return read
 
+    # parses the values read from the file, which have to be a dictionary
+    @staticmethod
+    def parse_values(text: str) -> dict:
+        values = LiteralParser(text).parse()
+        if not isinstance(values, dict):
+            raise ValueError("The values have to be inside of a dictionary.")
+        return values
+
 
 def resource_path(relative_path):
     """PyInstaller Helper"""
@@ -2064,22 +2998,12 @@ def resource_path(relative_path):
     return os.path.join(os.path.abspath("."), relative_path)
 
 
-# # setup
-root = App(
-    windows_icon=resource_path("other_essentials/app_icon.ico"),
-    linux_icon=resource_path("other_essentials/app_icon.png"),
-    mac_icon=resource_path("other_essentials/app_icon.icns"),
-    title="Image References",
-    geometry=(550, 650),
-    size_changer_sizes=(454, 788),
-    min_height=346,
-)
-
-
-def switch_theme(switch_theme_not=True):
+def switch_theme(root: App, switch_theme_not=True):
     """Switches the appearance of the app to dark or light mode. The
     "switch_theme" arg is to update the rest of the theme when the app
     starts up again without changing the theme.
+
+    :param root: The window of the app.
     """
     if switch_theme_not:
         if ctk.get_appearance_mode() == "Dark":
@@ -2088,10 +3012,7 @@ def switch_theme(switch_theme_not=True):
             ctk.set_appearance_mode("dark")
 
         root.save_load_system.values["theme"] = ctk.get_appearance_mode()
-        root.save_load_system.save_value(
-            input_value=str(root.save_load_system.values),
-            file_name=root.save_load_system.file_name,
-        )
+        root.save_load_system.save()
 
     # update the time entry color states so that they match with the
     # theme switch
@@ -2129,9 +3050,23 @@ def switch_theme(switch_theme_not=True):
     )
 
 
-# updates the currently used theme so that the image displayer and other
-# label colors match up.
-switch_theme(switch_theme_not=False)
+# the window is only made when the app is run, so that importing this
+# module doesn't start a main loop
+if __name__ == "__main__":
+    # # setup
+    root = App(
+        windows_icon=resource_path("other_essentials/app_icon.ico"),
+        linux_icon=resource_path("other_essentials/app_icon.png"),
+        mac_icon=resource_path("other_essentials/app_icon.icns"),
+        title="Image References",
+        geometry=(550, 650),
+        size_changer_sizes=(454, 788),
+        min_height=346,
+    )
+
+    # updates the currently used theme so that the image displayer and
+    # other label colors match up.
+    switch_theme(root, switch_theme_not=False)
 
-# run
-root.mainloop()
+    # run
+    root.mainloop()
@@ -0,0 +1,113 @@
+"""Packs every icon in app_widget_images into a single atlas image, along
+with a manifest of where every icon is inside of it, so that the app only
+has to read and decode one image for all of its icons.
+
+The transparent border around every icon is cut off before it's packed,
+and the manifest keeps the icon's original size and where the rest of it
+was, so the app can put the icon back together exactly.
+
+Usage (from the root of the repository), whenever an icon is changed:
+    python scripts/build_atlas.py
+"""
+
+from pathlib import Path
+import json
+import sys
+
+from PIL import Image
+
+ICON_FOLDER = Path(__file__).resolve().parent.parent / "app_widget_images"
+ATLAS_NAME = "atlas.png"
+MANIFEST_NAME = "atlas.json"
+MAX_ATLAS_WIDTH = 2048
+PADDING = 2
+
+
+def load_icons() -> dict[str, tuple[Image.Image, tuple[int, int], tuple[int, int]]]:
+    """Returns every icon by its path from the root of the repository,
+    cut down to the part that isn't transparent, along with its original
+    size and where the cut down part starts.
+    """
+    icons = {}
+    for path in sorted(ICON_FOLDER.rglob("*.png")):
+        if path.parent == ICON_FOLDER and path.name == ATLAS_NAME:
+            continue
+
+        icon = Image.open(path).convert("RGBA")
+        box = icon.getchannel("A").getbbox() or (0, 0, 1, 1)
+        icons[path.relative_to(ICON_FOLDER.parent).as_posix()] = (
+            icon.crop(box),
+            icon.size,
+            box[:2],
+        )
+    return icons
+
+
+def shelves(
+    sizes: dict[str, tuple[int, int]], width: int
+) -> tuple[dict[str, tuple[int, int]], int, int]:
+    """Places every icon in rows (shelves) no wider than width, from the
+    tallest icon to the shortest, and returns where every icon goes
+    along with the size of the atlas.
+    """
+    positions = {}
+    x = y = shelf_height = atlas_width = 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], name)):
+        icon_width, icon_height = sizes[name]
+        if x and x + icon_width > width:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        positions[name] = (x, y)
+        x += icon_width + PADDING
+        shelf_height = max(shelf_height, icon_height)
+        atlas_width = max(atlas_width, x - PADDING)
+    return positions, atlas_width, y + shelf_height
+
+
+def pack(
+    sizes: dict[str, tuple[int, int]],
+) -> tuple[dict[str, tuple[int, int]], int, int]:
+    """Tries every shelf width up to MAX_ATLAS_WIDTH, and returns the
+    packing that makes the smallest atlas, since decoding the atlas takes
+    longer the more pixels it has.
+    """
+    narrowest = max(width for width, _ in sizes.values())
+    packings = [
+        shelves(sizes, width)
+        for width in range(narrowest, max(narrowest, MAX_ATLAS_WIDTH) + 1, 8)
+    ]
+    return min(packings, key=lambda packing: packing[1] * packing[2])
+
+
+def main() -> int:
+    icons = load_icons()
+    if not icons:
+        print(f"No icons were found in {ICON_FOLDER}.")
+        return 1
+
+    positions, atlas_width, atlas_height = pack(
+        {name: icon.size for name, (icon, _, _) in icons.items()}
+    )
+
+    atlas = Image.new("RGBA", (atlas_width, atlas_height), (0, 0, 0, 0))
+    manifest = {"version": 1, "image": ATLAS_NAME, "icons": {}}
+    for name, (icon, size, offset) in icons.items():
+        atlas.paste(icon, positions[name])
+        manifest["icons"][name] = {
+            "box": [*positions[name], *icon.size],
+            "size": list(size),
+            "offset": list(offset),
+        }
+
+    atlas.save(ICON_FOLDER / ATLAS_NAME, optimize=True)
+    with open(ICON_FOLDER / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    print(f"Packed {len(icons)} icons into a {atlas_width}x{atlas_height} atlas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
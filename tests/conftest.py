@@ -0,0 +1,8 @@
+"""Lets the tests import core and main from the root of the repository,
+the same way the benchmarks do.
+"""
+
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
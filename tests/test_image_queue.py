@@ -0,0 +1,131 @@
+from pathlib import Path
+
+import pytest
+
+from core import ImageQueue, ImageSession, ShuffledOrder
+
+# a queue small enough for the table, and one big enough for the
+# Feistel network
+SIZES = [1, 2, 7, 100, ShuffledOrder.table_size, ShuffledOrder.table_size + 1, 5000]
+
+
+def permutation(order: ShuffledOrder, size: int) -> list[int]:
+    indexes = [order[position] for position in range(size)]
+    assert sorted(indexes) == list(range(size))
+    assert [order.position_of(index) for index in indexes] == list(range(size))
+    return indexes
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_shuffled_order_is_a_permutation(size):
+    permutation(ShuffledOrder(size=size, seed=1), size)
+
+
+def test_shuffled_order_without_a_seed_keeps_the_order():
+    order = ShuffledOrder()
+    assert [order[position] for position in range(10)] == list(range(10))
+    assert order.position_of(7) == 7
+
+
+@pytest.mark.parametrize("size", [100, 5000])
+def test_shuffled_order_leaves_positions_past_its_size_alone(size):
+    order = ShuffledOrder(size=size, seed=2)
+    assert order[size] == size
+    assert order.position_of(size + 3) == size + 3
+
+
+@pytest.mark.parametrize("size", [100, 5000])
+def test_shuffled_order_depends_on_the_seed(size):
+    assert permutation(ShuffledOrder(size=size, seed=3), size) == permutation(
+        ShuffledOrder(size=size, seed=3), size
+    )
+    assert permutation(ShuffledOrder(size=size, seed=3), size) != permutation(
+        ShuffledOrder(size=size, seed=4), size
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("keep", [0, 1, 5, 50])
+def test_reshuffle_keeps_the_prefix(size, keep):
+    order = ShuffledOrder(size=size, seed=5)
+    before = permutation(order, size)
+    order.reshuffle(size=size, keep=keep)
+    after = permutation(order, size)
+    assert after[:keep] == before[:keep]
+
+
+def test_reshuffle_can_grow_the_queue():
+    order = ShuffledOrder(size=5000, seed=6)
+    before = permutation(order, 5000)
+    order.reshuffle(size=6000, keep=10)
+    assert permutation(order, 6000)[:10] == before[:10]
+
+
+@pytest.mark.parametrize("size", [100, 5000])
+def test_interleave_only_moves_positions_from_first_on(size):
+    order = ShuffledOrder(size=size, seed=7)
+    before = permutation(order, size)
+    order.interleave(start=size, end=size + 50, first=10)
+    after = permutation(order, size + 50)
+    assert after[:10] == before[:10]
+    assert sorted(after[10:]) == sorted(before[10:] + list(range(size, size + 50)))
+
+
+def test_swap_then_reshuffle_keeps_the_swapped_prefix():
+    order = ShuffledOrder(size=5000, seed=8)
+    order.swap(0, 4999)
+    swapped = permutation(order, 5000)
+    order.reshuffle(size=5000, keep=1)
+    assert permutation(order, 5000)[0] == swapped[0]
+
+
+def test_image_queue_ends_and_loops():
+    queue = ImageQueue(image_amount=5, image_limit=3)
+    assert len(queue) == 3
+    assert queue.next(2, loop=False) is None
+    assert queue.next(2, loop=True) == 0
+    assert queue.previous(0, loop=True) == 2
+    assert not ImageQueue()
+    with pytest.raises(IndexError):
+        ImageQueue().first
+
+
+def paths(prefix: str, amount: int) -> list[Path]:
+    return [Path(f"/{prefix}/{index}.png") for index in range(amount)]
+
+
+def test_session_merge_keeps_the_shown_images():
+    session = ImageSession()
+    session.add(paths("a", 5000), reshuffle=True)
+    session.position = 20
+    shown = [session.path(position) for position in range(21)]
+
+    session.merge(paths("b", 3000), randomize=True)
+    chunks = 0
+    while session.interleave_merged(limit=1000):
+        chunks += 1
+
+    assert chunks == 2
+    assert [session.path(position) for position in range(21)] == shown
+    assert {session.path(position) for position in range(8000)} == set(
+        paths("a", 5000) + paths("b", 3000)
+    )
+
+
+def test_session_reshuffle_unplayed_keeps_the_shown_images():
+    session = ImageSession()
+    session.add(paths("a", 200), reshuffle=True)
+    session.position = 30
+    session.add(paths("b", 100))
+    shown = [session.path(position) for position in range(31)]
+
+    session.reshuffle_unplayed()
+    assert [session.path(position) for position in range(31)] == shown
+    assert len({session.path(position) for position in range(300)}) == 300
+
+
+def test_session_neighbours_go_around_when_looping():
+    session = ImageSession()
+    session.add(paths("a", 10))
+    assert session.neighbour_positions(depth=2, loop=True) == [1, 9, 2, 8]
+    assert session.neighbour_positions(depth=2, loop=False) == [1, 2]
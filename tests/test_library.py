@@ -0,0 +1,142 @@
+from collections import Counter
+from random import Random
+from threading import Event
+import os
+
+from core import ReservoirSampler, ScanIndex, is_image_file
+
+
+def sample(size: int, stream: list[int], chunk: int, seed: int) -> list[int]:
+    """Runs a stream through a ReservoirSampler a chunk at a time, and
+    returns the items it kept.
+    """
+    sampler = ReservoirSampler(size=size, random=Random(seed))
+    kept = []
+    for start in range(0, len(stream), chunk):
+        items = stream[start : start + chunk]
+        for offset, index in sampler.take(len(items)):
+            if index == len(kept):
+                kept.append(items[offset])
+            else:
+                kept[index] = items[offset]
+    return kept
+
+
+def test_reservoir_fills_up_first():
+    sampler = ReservoirSampler(size=5, random=Random(0))
+    assert list(sampler.take(3)) == [(0, 0), (1, 1), (2, 2)]
+    assert not sampler.full
+    picked = list(sampler.take(4))
+    assert picked[:2] == [(0, 3), (1, 4)]
+    assert sampler.full and sampler.seen == 7
+
+
+def test_reservoir_keeps_a_short_stream_whole():
+    assert sample(size=10, stream=list(range(4)), chunk=3, seed=1) == [0, 1, 2, 3]
+
+
+def test_reservoir_sample_is_distinct_and_in_the_stream():
+    kept = sample(size=50, stream=list(range(10_000)), chunk=97, seed=2)
+    assert len(kept) == 50
+    assert len(set(kept)) == 50
+    assert all(0 <= item < 10_000 for item in kept)
+
+
+def test_reservoir_picks_every_item_equally_often():
+    counts = Counter()
+    runs = 4000
+    for seed in range(runs):
+        counts.update(sample(size=5, stream=list(range(20)), chunk=3, seed=seed))
+
+    # every item is picked with a chance of 5/20
+    expected = runs * 5 / 20
+    assert set(counts) == set(range(20))
+    assert all(abs(count - expected) < expected * 0.15 for count in counts.values())
+
+
+def make_tree(root: str) -> None:
+    for folder in ("a", os.path.join("a", "b"), "c"):
+        os.makedirs(os.path.join(root, folder))
+    for file_name in (
+        "1.png",
+        os.path.join("a", "2.JPG"),
+        os.path.join("a", "b", "3.jpeg"),
+        os.path.join("c", "notes.txt"),
+    ):
+        open(os.path.join(root, file_name), "w").close()
+
+
+def walk(scan_index: ScanIndex) -> set[str]:
+    return {
+        os.path.join(dir_path, image_name)
+        for dir_path, image_names in scan_index.walk(Event())
+        for image_name in image_names
+    }
+
+
+def test_scan_index_only_lists_changed_directories(tmp_path):
+    folder = str(tmp_path / "images")
+    index_folder = str(tmp_path / "index")
+    make_tree(folder)
+
+    scan_index = ScanIndex(folder=folder, index_folder=index_folder)
+    scan_index.load()
+    first = walk(scan_index)
+    assert {os.path.basename(path) for path in first} == {"1.png", "2.JPG", "3.jpeg"}
+    assert scan_index.listed == 4
+    scan_index.save()
+
+    scan_index = ScanIndex(folder=folder, index_folder=index_folder)
+    scan_index.load()
+    assert walk(scan_index) == first
+    assert scan_index.listed == 0
+
+    # a new image changes the modification time of its directory
+    changed = os.path.join(folder, "a", "b")
+    open(os.path.join(changed, "4.png"), "w").close()
+    modified_time = os.stat(changed).st_mtime_ns + 1_000_000_000
+    os.utime(changed, ns=(modified_time, modified_time))
+
+    second = walk(scan_index)
+    assert scan_index.listed == 1
+    assert second - first == {os.path.join(changed, "4.png")}
+
+
+def test_scan_index_ignores_a_broken_or_foreign_index(tmp_path):
+    folder = str(tmp_path / "images")
+    index_folder = str(tmp_path / "index")
+    make_tree(folder)
+
+    scan_index = ScanIndex(folder=folder, index_folder=index_folder)
+    walk(scan_index)
+    scan_index.save()
+
+    with open(scan_index.file_name, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    broken = ScanIndex(folder=folder, index_folder=index_folder)
+    broken.load()
+    assert broken.directories == {}
+
+    with open(scan_index.file_name, "w", encoding="utf-8") as f:
+        f.write('{"version": 1, "folder": "/somewhere/else", "directories": {}}')
+    foreign = ScanIndex(folder=folder, index_folder=index_folder)
+    foreign.load()
+    assert foreign.directories == {}
+
+
+def test_scan_index_prune_only_keeps_saved_folders(tmp_path):
+    index_folder = str(tmp_path / "index")
+    os.makedirs(index_folder)
+    kept = ScanIndex.index_file_name("/kept", index_folder)
+    removed = ScanIndex.index_file_name("/removed", index_folder)
+    for file_name in (kept, removed):
+        open(file_name, "w").close()
+
+    ScanIndex.prune(index_folder, ["/kept"])
+    assert os.path.exists(kept) and not os.path.exists(removed)
+
+
+def test_is_image_file_ignores_case():
+    suffixes = (".png", ".jpg", ".jpeg")
+    assert is_image_file("photo.JPG", suffixes)
+    assert not is_image_file("notes.txt", suffixes)
@@ -0,0 +1,90 @@
+import pytest
+
+from main import LiteralParser
+
+VALUES = [
+    {},
+    [],
+    {"theme": "Dark", "countdown": True, "image_limit": None},
+    {"directories": ["C:\\Users\\me\\Pictures", "/home/me/Pictures"]},
+    {"timer": [0, 1, 30], "scale": 1.5, "small": 1e-07, "negative": -3},
+    {"quotes": 'it\'s "quoted"', "escapes": "tab\tnew\nline\\"},
+    {"unicode": "ünïcödé イメージ", "control": "\x00\x7f"},
+    {1: "int keys", 2.5: "float keys", None: "none key", True: [{"nested": []}]},
+]
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_parser_reads_back_what_str_writes(value):
+    assert LiteralParser(str(value)).parse() == value
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_parser_agrees_with_literal_eval(value):
+    from ast import literal_eval
+
+    assert LiteralParser(str(value)).parse() == literal_eval(str(value))
+
+
+def test_parser_allows_whitespace_and_trailing_commas():
+    assert LiteralParser('\n { "a" : [ 1 , 2 , ] , }\n').parse() == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "{",
+        "{'theme': 'Dark'",
+        "{'theme' 'Dark'}",
+        "{'theme': }",
+        "{'a': 1,, 'b': 2}",
+        "{'a': 'unterminated}",
+        "{'a': 1} {'b': 2}",
+        "{'a': __import__('os').system('echo hacked')}",
+        "{'a': open('preferences.txt').read()}",
+        "{'a': 1 + 1}",
+        "{'a': [1, 2]}; print(1)",
+        "{'a': b'bytes', 'b': 0x10, 'c': nan}",
+        "{[1]: 'unhashable key'}",
+        "{'a': '\\U0011ffff'}",
+        "{'a': " + "9" * 5000 + "}",
+        "[" * 100_000 + "]" * 100_000,
+        "\x00",
+    ],
+)
+def test_parser_rejects_malformed_and_hostile_text(text):
+    with pytest.raises(SyntaxError):
+        LiteralParser(text).parse()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "{'theme': 'Dark', 'countdown': Tru",
+        "{'theme': 'Dark'} + __import__('os').system('echo hacked')",
+        "['not', 'a', 'dictionary']",
+        "",
+    ],
+)
+def test_broken_preferences_fall_back_to_the_defaults(
+    text, tmp_path, monkeypatch, capsys
+):
+    import main
+
+    warnings = []
+    monkeypatch.setattr(
+        main.messagebox, "showwarning", lambda **kwargs: warnings.append(kwargs)
+    )
+    file_name = tmp_path / "preferences.txt"
+    file_name.write_text(text)
+    defaults = {"theme": "Light", "countdown": False}
+
+    save_load_system = main.SaveLoadSystem(
+        file_name=str(tmp_path / "preferences"), default_values=dict(defaults)
+    )
+
+    assert save_load_system.values == defaults
+    assert "SaveLoadWarning" in capsys.readouterr().out
+    assert len(warnings) == 1
+    assert LiteralParser(file_name.read_text()).parse() == defaults
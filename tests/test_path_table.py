@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from core import PathTable
+
+
+def test_path_table_gives_back_every_path():
+    paths = [
+        Path("/pictures/a/1.png"),
+        Path("/pictures/a/2.jpg"),
+        Path("/pictures/b/1.png"),
+        Path("/pictures/ünïcödé/イメージ.jpeg"),
+        Path("relative/3.png"),
+    ]
+    table = PathTable(paths)
+    assert len(table) == len(paths)
+    assert [table[index] for index in range(len(paths))] == paths
+    assert list(table) == paths
+
+
+def test_path_table_keeps_every_directory_once():
+    table = PathTable(f"/pictures/{index % 3}/{index}.png" for index in range(300))
+    assert len(table._directories) == 3
+    assert table[299] == Path("/pictures/2/299.png")
+
+
+def test_path_table_replaces_and_appends():
+    table = PathTable(["/a/1.png", "/a/2.png"])
+    table[0] = "/b/3.png"
+    table.append(Path("/a/4.png"))
+    table.extend(["/c/5.png"])
+    assert list(table) == [
+        Path("/b/3.png"),
+        Path("/a/2.png"),
+        Path("/a/4.png"),
+        Path("/c/5.png"),
+    ]
+
+
+def test_path_table_is_compact():
+    table = PathTable(f"/pictures/IMG_{index:07}.jpg" for index in range(1000))
+
+    # 14 bytes per image plus the 15 bytes of every file name
+    assert table.nbytes() == 1000 * (14 + 15)